@@ -0,0 +1,121 @@
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import degrees
+
+# Queries handed to a worker at a time
+CHUNK_SIZE = 256
+
+# Report throughput after this many results
+REPORT_EVERY = 10000
+
+
+def main():
+    if len(sys.argv) not in (4, 5):
+        sys.exit("Usage: python batch.py directory queries.csv output.(csv|jsonl) [workers]")
+    directory, queries, output = sys.argv[1:4]
+    workers = int(sys.argv[4]) if len(sys.argv) == 5 else os.cpu_count()
+
+    # Load data once; forked workers share the parent's graph read-only
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    degrees.build_components()
+    print("Data loaded.")
+
+    start = time.perf_counter()
+    count = 0
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        write = writer(f, output)
+        for result in run(directory, read_queries(queries), workers):
+            write(result)
+            count += 1
+            if count % REPORT_EVERY == 0:
+                report(count, start)
+    report(count, start)
+
+
+def read_queries(filename):
+    """
+    Yields (source, target) person_id pairs from a CSV file
+    with `source` and `target` columns.
+    """
+    with open(filename, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield row["source"], row["target"]
+
+
+def run(directory, queries, workers):
+    """
+    Answers every (source, target) query across a pool of `workers`
+    processes, yielding results in completion order.
+    """
+    context = multiprocessing.get_context(
+        "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    )
+    with context.Pool(workers, initializer=initialize,
+                      initargs=(directory,)) as pool:
+        yield from pool.imap_unordered(answer, queries, CHUNK_SIZE)
+
+
+def initialize(directory):
+    """
+    Loads the graph in a worker that did not inherit it from the parent,
+    as happens when processes are spawned rather than forked.
+    """
+    if degrees.graph is None:
+        degrees.load_data(directory, compact=True)
+        degrees.build_components()
+
+
+def answer(query):
+    """
+    Returns a result dict for one (source, target) query.
+    """
+    source, target = query
+    result = {"source": source, "target": target, "degrees": None, "path": None}
+    if (source not in degrees.graph.person_index
+            or target not in degrees.graph.person_index):
+        result["error"] = "Person not found."
+        return result
+    path = degrees.shortest_path(source, target, bidirectional=True)
+    if path is not None:
+        result["degrees"] = len(path)
+        result["path"] = path
+    return result
+
+
+def writer(f, filename):
+    """
+    Returns a function writing one result to `f` as JSON Lines
+    or CSV, depending on the extension of `filename`.
+    """
+    if filename.endswith(".jsonl"):
+        def write(result):
+            f.write(json.dumps(result) + "\n")
+        return write
+
+    rows = csv.writer(f)
+    rows.writerow(["source", "target", "degrees", "path", "error"])
+
+    # An empty error with an empty path means the people are not connected
+    def write(result):
+        path = result["path"]
+        if path is not None:
+            path = ";".join(f"{movie_id}:{person_id}" for movie_id, person_id in path)
+        rows.writerow([result["source"], result["target"], result["degrees"], path,
+                       result.get("error")])
+    return write
+
+
+def report(count, start):
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0
+    print(f"{count} queries in {elapsed:.2f}s ({rate:.1f} queries/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmarks degrees on a dataset, reporting load time and peak memory,
+neighbor expansion rate, and shortest_path latency, nodes expanded and
+queries per second by degrees of separation for each search mode.
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+
+# Random source/target pairs timed per search mode
+QUERIES = 200
+
+# People whose neighbors are expanded when timing neighbors_for_person
+NEIGHBOR_SAMPLE = 2000
+
+# Search modes as (label, compact, bidirectional)
+MODES = [
+    ("bfs", False, False),
+    ("bidirectional", False, True),
+    ("compact bfs", True, False),
+    ("compact bidirectional", True, True),
+]
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python benchmark.py directory [queries] [seed]")
+    directory = sys.argv[1]
+    queries = int(sys.argv[2]) if len(sys.argv) >= 3 else QUERIES
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else 0
+
+    print("load_data")
+    measure_load("dicts", lambda: degrees.load_data(directory))
+    measure_load("compact csv", lambda: degrees.load_data(directory, compact=True, snapshot=False))
+    # The first snapshot load writes it, the second maps it
+    degrees.load_data(directory, compact=True)
+    measure_load("compact snapshot", lambda: degrees.load_data(directory, compact=True))
+
+    rng = random.Random(seed)
+    people = list(degrees.all_people())
+    pairs = [(rng.choice(people), rng.choice(people)) for _ in range(queries)]
+    sample = rng.sample(people, min(NEIGHBOR_SAMPLE, len(people)))
+
+    for label, compact, bidirectional in MODES:
+        reset()
+        degrees.load_data(directory, compact=compact)
+        print(label)
+        measure_neighbors(sample)
+        measure_paths(pairs, bidirectional)
+
+
+def measure_load(label, load):
+    """
+    Times one call of `load` and reports the peak memory of another,
+    since tracing allocations slows loading down several times over.
+    """
+    reset()
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+
+    reset()
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label}: {elapsed:.3f}s, peak {peak / 2 ** 20:.1f} MiB")
+
+
+def reset():
+    """Drops all loaded data so the next load starts from scratch."""
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+
+
+def measure_neighbors(sample):
+    """Times neighbors_for_person over a sample of people."""
+    start = time.perf_counter()
+    pairs = 0
+    for person_id in sample:
+        pairs += len(degrees.neighbors_for_person(person_id))
+    elapsed = time.perf_counter() - start
+    rate = len(sample) / elapsed if elapsed else 0
+    print(f"  neighbors_for_person: {rate:.0f} people/sec, {pairs / len(sample):.1f} pairs each")
+
+
+def measure_paths(pairs, bidirectional):
+    """
+    Times shortest_path over source/target pairs, grouping latency and
+    nodes expanded by the degrees of separation found.
+    """
+    by_distance = {}
+    start = time.perf_counter()
+    for source, target in pairs:
+        query_start = time.perf_counter()
+        path = degrees.shortest_path(source, target, bidirectional=bidirectional)
+        elapsed = time.perf_counter() - query_start
+        distance = "none" if path is None else len(path)
+        by_distance.setdefault(distance, []).append((elapsed, degrees.search_stats["expanded"]))
+    total = time.perf_counter() - start
+
+    for distance in sorted(by_distance, key=lambda d: (d == "none", d if d != "none" else 0)):
+        results = by_distance[distance]
+        latency = sum(elapsed for elapsed, _ in results) / len(results)
+        expanded = sum(nodes for _, nodes in results) / len(results)
+        print(f"  distance {distance}: {len(results)} queries, "
+              f"{latency * 1000:.2f} ms, {expanded:.0f} nodes expanded")
+    print(f"  {len(pairs) / total:.1f} queries/sec")
+
+
+if __name__ == "__main__":
+    main()
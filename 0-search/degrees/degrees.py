@@ -1,9 +1,17 @@
 import csv
+import heapq
+import itertools
+import os
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import load_compact
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from util import (Node, StackFrontier, QueueFrontier, PriorityFrontier,
+                  DisjointSet)
 
-# Maps names to a set of corresponding person_ids
+# Maps names to a set of corresponding person_ids; compact graphs
+# look names up through graph.people_by_name instead
 names = {}
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
@@ -12,11 +20,63 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used in place of people and movies
+# when data is loaded with compact=True
+graph = None
 
-def load_data(directory):
+# NameIndex over the keys of names, for prefix and fuzzy name lookups,
+# built by build_name_index or on the first lookup that needs it
+name_index = None
+
+# Whether person_id_for_name suggests close matches for unknown names
+fuzzy_names = False
+
+# LandmarkIndex whose bounds reject unconnected pairs and estimate
+# distances, and whose lower bounds drive an A* search in place of the
+# plain breadth first search over dicts
+landmarks = None
+
+# DisjointSet grouping people connected through shared movies
+components = None
+
+# TreeCache of breadth first search trees from repeat sources; when set,
+# shortest_path answers their queries by walking the cached tree
+tree_cache = None
+
+# Maps person_ids to a tuple of their (movie_id, person_id) neighbors,
+# filled by build_costars so neighbors_for_person stops allocating
+costars = None
+
+# Most neighbor pairs costars may hold, or None for no limit
+costar_limit = None
+
+# Counts neighbor pairs held by costars
+costar_stats = {"pairs": 0}
+
+# Counts nodes expanded by the most recent search
+search_stats = {"expanded": 0}
+
+
+def load_data(directory, compact=False, snapshot=True, index_names=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is set, the graph is kept as a CompactGraph of integer
+    arrays and the people and movies dicts are left empty. Compact data
+    is mapped from a binary snapshot next to the CSVs when `snapshot` is
+    set and the snapshot is newer than the CSVs, and written otherwise.
+
+    If `index_names` is set, names with no exact match are looked up
+    fuzzily in a NameIndex, built the first time one is needed.
     """
+    global graph, name_index, fuzzy_names
+    name_index = None
+    fuzzy_names = index_names
+    if compact:
+        graph = load_compact(directory, snapshot)
+        return
+    graph = None
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -59,7 +119,10 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    # Components are built only where many queries pay for them: a
+    # bidirectional search from the smaller side of an unconnected pair
+    # already ends quickly, far sooner than grouping everyone
+    load_data(directory, compact=True, index_names=True)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +132,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=True)
 
     if path is None:
         print("Not connected.")
@@ -78,21 +141,51 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is set, frontiers are grown from both ends
+    and the search stops where they meet.
+
+    If a tree cache is set, the path is read from a cached search tree
+    rooted at the source or target when there is one. A source that
+    misses again has its tree built and cached, if it fits.
+
+    If a landmark index is loaded, pairs it proves unconnected are
+    rejected without a search, and an A* search guided by its distance
+    bounds replaces the plain breadth first search over dicts. Compact
+    and bidirectional searches already expand far fewer people than
+    weak landmark bounds can save, so they are kept.
+
     If no possible path, returns None.
     """
+    if components is not None and not components.connected(source, target):
+        # Different components are never connected, so skip the search
+        search_stats["expanded"] = 0
+        return None
+    if landmarks is not None and landmarks.lower_bound(source, target) is None:
+        search_stats["expanded"] = 0
+        return None
+    if tree_cache is not None:
+        cached = cached_tree(source, target)
+        if cached is not None:
+            return tree_path(*cached, source, target)
+    if graph is not None:
+        return compact_path(source, target, bidirectional)
+    if bidirectional:
+        return bidirectional_path(source, target)
+    if landmarks is not None:
+        return astar_path(source, target)
 
-    # TODO
+    search_stats["expanded"] = 0
     start = Node(state = source, parent = None, action = None)
     frontier = QueueFrontier() # breadth first search
     explored = set()
@@ -116,6 +209,7 @@ def shortest_path(source, target):
             return solution
         
         explored.add(node.state)
+        search_stats["expanded"] += 1
 
         for action, state in neighbors_for_person(node.state):
             if not frontier.contains_state(state) and state not in explored:
@@ -123,21 +217,553 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
+def bidirectional_path(source, target, excluded=(), banned=()):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth first
+    from both ends at once.
+
+    Each side is expanded one full level at a time, always growing
+    the smaller frontier, so the first level on which the two searches
+    meet holds a shortest path.
+
+    The path passes through no one in `excluded`, and does not start
+    with any (movie_id, person_id) step in `banned`.
+
+    If no possible path, returns None.
+    """
+    search_stats["expanded"] = 0
+    if source == target:
+        return []
+
+    # Maps each reached person to its Node, for both directions
+    forward = {source: Node(state=source, parent=None, action=None)}
+    backward = {target: Node(state=target, parent=None, action=None)}
+    forward_level = [forward[source]]
+    backward_level = [backward[target]]
+
+    while forward_level and backward_level:
+        if len(forward_level) <= len(backward_level):
+            level, reached, other = forward_level, forward, backward
+        else:
+            level, reached, other = backward_level, backward, forward
+
+        next_level = []
+        meeting = None
+        for node in level:
+            search_stats["expanded"] += 1
+            for action, state in neighbors_for_person(node.state):
+                if state in reached or state in excluded:
+                    continue
+                # A banned first step may be taken from either end
+                if banned and (node.state == source and (action, state) in banned
+                               or state == source and (action, node.state) in banned):
+                    continue
+                child = Node(state=state, parent=node, action=action)
+                reached[state] = child
+                next_level.append(child)
+                # Keep the first meeting point; every meeting on this
+                # level gives a path of the same length
+                if meeting is None and state in other:
+                    meeting = state
+        if meeting is not None:
+            return join_paths(forward[meeting], backward[meeting])
+
+        if reached is forward:
+            forward_level = next_level
+        else:
+            backward_level = next_level
+
+    # no possible path
+    return None
+
+
+def cached_tree(source, target):
+    """
+    Returns (root, tree) for a cached search tree rooted at the source
+    or target, building the source's tree first if it missed before and
+    the tree fits the cache. Returns None if there is no such tree.
+    """
+    for root in (source, target):
+        if root in tree_cache:
+            return root, tree_cache.get(root)
+    tree_cache.get(source)
+    if not tree_cache.admit(source):
+        return None
+    if components is not None and components.component_size(source) > tree_cache.max_nodes:
+        tree_cache.reject(source)
+        return None
+
+    search_stats["expanded"] = 0
+    if graph is not None:
+        tree = graph.tree(graph.person_index[source], tree_cache.max_nodes)
+        search_stats["expanded"] = graph.expanded
+    else:
+        tree = bfs_tree(source, tree_cache.max_nodes)
+    if tree is None:
+        tree_cache.reject(source)
+        return None
+    tree_cache.put(source, tree)
+    return source, tree
+
+
+def tree_path(root, tree, source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that
+    connect the source to the target by walking the parent links of
+    the search tree of `root`, which is one of them.
+
+    If no possible path, returns None.
+    """
+    search_stats["expanded"] = 0
+    other = target if root == source else source
+    if graph is not None:
+        person = graph.person_index[other]
+        if person not in tree:
+            return None
+        if root == source:
+            path = graph.join(tree, {person: None}, person)
+        else:
+            # Co-starring is symmetric, so the target's tree works in reverse
+            path = graph.join({person: None}, tree, person)
+        return [(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in path]
+
+    if other not in tree:
+        return None
+    if root == source:
+        return join_paths(tree[target], Node(state=target, parent=None, action=None))
+    return join_paths(Node(state=source, parent=None, action=None), tree[source])
+
+
+def bfs_tree(source, limit):
+    """
+    Returns a dict mapping every person reachable from the source to
+    the Node at the end of their shortest path from it.
+
+    Returns None if the tree would hold more than `limit` people.
+    """
+    tree = {source: Node(state=source, parent=None, action=None)}
+    frontier = QueueFrontier()
+    frontier.add(tree[source])
+    while not frontier.empty():
+        node = frontier.remove()
+        search_stats["expanded"] += 1
+        for action, state in neighbors_for_person(node.state):
+            if state not in tree:
+                tree[state] = Node(state=state, parent=node, action=action)
+                frontier.add(tree[state])
+        if len(tree) > limit:
+            return None
+    return tree
+
+
+def astar_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using A* search with
+    landmark lower bounds as the heuristic.
+
+    If no possible path, returns None.
+    """
+    search_stats["expanded"] = 0
+    if landmarks.lower_bound(source, target) is None:
+        return None
+
+    # Maps each reached person to the cost and Node of their best path
+    cost = {source: 0}
+    best = {source: Node(state=source, parent=None, action=None)}
+
+    def priority(node):
+        # Among equal estimates, expand the person furthest along first,
+        # since their bound is the tightest
+        bound = landmarks.lower_bound(node.state, target)
+        return cost[node.state] + (bound or 0), -cost[node.state]
+
+    frontier = PriorityFrontier(priority)
+    frontier.add(best[source])
+    explored = set()
+    while not frontier.empty():
+        node = frontier.remove()
+        if node is not best[node.state] or node.state in explored:
+            # stale entry for a person since reached more cheaply
+            continue
+        if node.state == target:
+            solution = []
+            while node.parent is not None:
+                solution.append((node.action, node.state))
+                node = node.parent
+            solution.reverse()
+            return solution
+
+        explored.add(node.state)
+        search_stats["expanded"] += 1
+        for action, state in neighbors_for_person(node.state):
+            if state in explored:
+                continue
+            if state not in cost or cost[node.state] + 1 < cost[state]:
+                cost[state] = cost[node.state] + 1
+                best[state] = Node(state=state, parent=node, action=action)
+                frontier.add(best[state])
+
+    # no possible path
+    return None
+
+
+def compact_path(source, target, bidirectional):
+    """
+    Runs shortest_path on the compact graph, translating person_ids
+    to and from integer indices.
+    """
+    path = graph.shortest_path(graph.person_index[source],
+                               graph.person_index[target], bidirectional)
+    search_stats["expanded"] = graph.expanded
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
+
+def join_paths(forward_node, backward_node):
+    """
+    Joins a node reached from the source and a node reached from the
+    target for the same person into one source-to-target path.
+    """
+    solution = []
+    node = forward_node
+    while node.parent is not None:
+        solution.append((node.action, node.state))
+        node = node.parent
+    solution.reverse()
+
+    # Walking back towards the target, each node's action is the movie
+    # shared with its parent
+    node = backward_node
+    while node.parent is not None:
+        solution.append((node.action, node.parent.state))
+        node = node.parent
+    return solution
+
+
+
+def shortest_path_dag(source, target):
+    """
+    Returns the DAG of every shortest path from the source to the
+    target, as a dict mapping each person on such a path to the
+    (movie_id, person_id) pairs that reach them from the layer before.
+
+    If no possible path, returns None.
+    """
+    search_stats["expanded"] = 0
+    depth = {source: 0}
+    parents = {source: []}
+    layer = [source]
+    while layer and target not in depth:
+        next_layer = []
+        for person_id in layer:
+            search_stats["expanded"] += 1
+            for movie_id, state in neighbors_for_person(person_id):
+                if state not in depth:
+                    depth[state] = depth[person_id] + 1
+                    parents[state] = []
+                    next_layer.append(state)
+                if depth[state] == depth[person_id] + 1:
+                    parents[state].append((movie_id, person_id))
+        layer = next_layer
+    if target not in depth:
+        return None
+
+    # Keep only the people that lead on to the target
+    dag = {}
+    stack = [target]
+    while stack:
+        person_id = stack.pop()
+        if person_id not in dag:
+            dag[person_id] = parents[person_id]
+            stack.extend(parent for _, parent in parents[person_id])
+    return dag
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, one at a time.
+
+    Paths are walked depth first through the shortest path DAG, so
+    only the path being built is held in memory.
+    """
+    dag = shortest_path_dag(source, target)
+    if dag is None:
+        return
+    if source == target:
+        yield []
+        return
+
+    # Steps from the person being visited on to the target, in reverse
+    suffix = []
+    stack = [(target, iter(dag[target]))]
+    while stack:
+        person_id, parents = stack[-1]
+        step = next(parents, None)
+        if step is None:
+            stack.pop()
+            if suffix:
+                suffix.pop()
+            continue
+        movie_id, parent = step
+        suffix.append((movie_id, person_id))
+        if parent == source:
+            yield suffix[::-1]
+            suffix.pop()
+        else:
+            stack.append((parent, iter(dag[parent])))
+
+
+def k_shortest_paths(source, target, k):
+    """
+    Yields up to k lists of (movie_id, person_id) pairs that connect
+    the source to the target without revisiting anyone, shortest first.
+
+    Paths are found by Yen's algorithm: each yielded path is branched at
+    every person on it, searching from there for the shortest path that
+    avoids the people before it and every first step already taken from
+    that same prefix. The shortest of these candidates is yielded next.
+    """
+    search_stats["expanded"] = 0
+    path = spur_path(source, target, set(), set())
+    if path is None:
+        return
+    paths = []
+    seen = {tuple(path)}
+    candidates = []
+    counter = itertools.count()
+    while True:
+        yield path
+        paths.append(path)
+        if len(paths) == k:
+            return
+
+        people = [source] + [person_id for _, person_id in path]
+        for i in range(len(path)):
+            prefix = path[:i]
+            banned = {taken[i] for taken in paths
+                      if len(taken) > i and taken[:i] == prefix}
+            spur = spur_path(people[i], target, set(people[:i]), banned)
+            if spur is None:
+                continue
+            candidate = prefix + spur
+            if tuple(candidate) not in seen:
+                seen.add(tuple(candidate))
+                heapq.heappush(candidates, (len(candidate), next(counter), candidate))
+
+        if not candidates:
+            return
+        _, _, path = heapq.heappop(candidates)
+
+
+def spur_path(source, target, excluded, banned):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that
+    connect the source to the target through no one in `excluded`,
+    without starting on a (movie_id, person_id) step in `banned`.
+
+    If no possible path, returns None.
+    """
+    if graph is not None:
+        path = graph.shortest_path(
+            graph.person_index[source], graph.person_index[target], True,
+            {graph.person_index[person_id] for person_id in excluded},
+            {(graph.movie_index[movie_id], graph.person_index[person_id])
+             for movie_id, person_id in banned})
+        search_stats["expanded"] += graph.expanded
+        if path is None:
+            return None
+        return [(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in path]
+
+    expanded = search_stats["expanded"]
+    path = bidirectional_path(source, target, excluded, banned)
+    search_stats["expanded"] += expanded
+    return path
+
+
+def load_delta(directory):
+    """
+    Applies whichever of people.csv, movies.csv and stars.csv exist in
+    `directory` as an append-only delta to the loaded data.
+    """
+    rows = {}
+    for name in ("people", "movies", "stars"):
+        filename = os.path.join(directory, f"{name}.csv")
+        rows[name] = []
+        if os.path.exists(filename):
+            with open(filename, encoding="utf-8") as f:
+                rows[name] = list(csv.DictReader(f))
+    apply_delta(rows["people"], rows["movies"], rows["stars"])
+
+
+def apply_delta(people_rows=(), movie_rows=(), star_rows=()):
+    """
+    Adds new people, movies and star links, given as rows shaped like
+    those of people.csv, movies.csv and stars.csv, to the loaded data
+    and to every derived index, so later searches match a full reload.
+    """
+    for row in people_rows:
+        if graph is not None:
+            graph.add_person(row["id"], row["name"], row["birth"])
+        elif row["id"] not in people:
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+            names.setdefault(row["name"].lower(), set()).add(row["id"])
+        else:
+            continue
+        if name_index is not None:
+            name_index.add(row["name"].lower())
+
+    for row in movie_rows:
+        if graph is not None:
+            graph.add_movie(row["id"], row["title"], row["year"])
+        elif row["id"] not in movies:
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+
+    # People whose neighbors changed
+    changed = set()
+    for row in star_rows:
+        person_id, movie_id = row["person_id"], row["movie_id"]
+        stars = add_star(person_id, movie_id)
+        if stars is None:
+            continue
+        changed.add(person_id)
+        changed.update(stars)
+        if components is not None and stars:
+            components.union(person_id, stars[0])
+
+    if not changed:
+        return
+    if costars is not None:
+        for person_id in changed:
+            neighbors = costars.pop(person_id, None)
+            if neighbors is not None:
+                costar_stats["pairs"] -= len(neighbors)
+        if costar_limit is None:
+            for person_id in changed:
+                neighbors_for_person(person_id)
+    if tree_cache is not None:
+        # New links can shorten any cached path
+        tree_cache.clear()
+    if landmarks is not None:
+        landmarks.relax(changed, neighbors_for_person)
+
+
+def add_star(person_id, movie_id):
+    """
+    Records that a person starred in a movie, returning the person_ids
+    of the movie's other stars, or None if either is unknown or the
+    link was already loaded.
+    """
+    if graph is not None:
+        person = graph.person_index.get(person_id)
+        movie = graph.movie_index.get(movie_id)
+        if person is None or movie is None:
+            return None
+        stars = [graph.person_ids[star] for star in graph.stars_for(movie)]
+        if not graph.add_star(person, movie):
+            return None
+        return stars
+
+    if person_id not in people or movie_id not in movies:
+        return None
+    if movie_id in people[person_id]["movies"]:
+        return None
+    stars = list(movies[movie_id]["stars"])
+    people[person_id]["movies"].add(movie_id)
+    movies[movie_id]["stars"].add(person_id)
+    return stars
+
+
+def build_components():
+    """
+    Groups people into connected components by joining the stars of
+    every movie, so shortest_path can reject unconnected pairs at once.
+    """
+    global components
+    components = DisjointSet()
+    if graph is not None:
+        for movie in range(len(graph.movie_ids)):
+            stars = graph.stars_for(movie)
+            for person in stars[1:]:
+                components.union(graph.person_ids[stars[0]], graph.person_ids[person])
+        return
+
+    for movie in movies.values():
+        stars = iter(movie["stars"])
+        first = next(stars, None)
+        for person_id in stars:
+            components.union(first, person_id)
+
+
+def build_landmarks(count=4):
+    """
+    Builds the LandmarkIndex of `count` landmarks used by shortest_path,
+    searching the compact graph's arrays directly when it is loaded.
+    """
+    global landmarks
+    if graph is not None:
+        landmarks = LandmarkIndex.from_graph(graph, count)
+    else:
+        landmarks = LandmarkIndex.build(all_people(), neighbors_for_person, count)
+
+
+def load_landmarks(filename):
+    """
+    Loads the LandmarkIndex used by shortest_path from a file written by
+    LandmarkIndex.save, into arrays when the compact graph is loaded.
+    """
+    global landmarks
+    landmarks = LandmarkIndex.load(filename, graph)
+
+
+def component_sizes():
+    """
+    Returns a dict mapping each component size to the number of
+    components of that size, for diagnostics.
+    """
+    sizes = {}
+    for person_id in all_people():
+        if components.find(person_id) == person_id:
+            size = components.component_size(person_id)
+            sizes[size] = sizes.get(size, 0) + 1
+    return dict(sorted(sizes.items(), reverse=True))
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = list(people_named(name))
+    suggested = False
+    if len(person_ids) == 0 and fuzzy_names:
+        # Offer close or partial matches instead
+        person_ids = [person_id for person_id, _, _ in find_people(name)]
+        suggested = True
     if len(person_ids) == 0:
         return None
-    elif len(person_ids) > 1:
-        print(f"Which '{name}'?")
+    elif len(person_ids) > 1 or suggested:
+        if suggested:
+            print(f"No exact match for '{name}'. Did you mean:")
+        else:
+            print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -150,11 +776,110 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def build_name_index():
+    """
+    Builds the NameIndex used for prefix and fuzzy name lookups.
+    """
+    global name_index
+    if graph is not None:
+        name_index = NameIndex(graph.people_by_name.distinct())
+    else:
+        name_index = NameIndex(names.keys())
+
+
+def find_people(query, limit=10):
+    """
+    Returns up to `limit` (person_id, name, birth) candidates whose
+    names match `query` exactly, by prefix or within a few edits,
+    best matches first.
+    """
+    if name_index is None:
+        build_name_index()
+    candidates = []
+    for name in name_index.lookup(query, limit):
+        for person_id in sorted(people_named(name)):
+            candidates.append((person_id, person_name(person_id), person_birth(person_id)))
+    return candidates[:limit]
+
+
+def people_named(name):
+    """Returns the set of person_ids of people with a name, ignoring case."""
+    if graph is not None:
+        return {graph.person_ids[person] for person in graph.people_by_name.all(name.lower())}
+    return names.get(name.lower(), set())
+
+
+def all_people():
+    """Returns the person_ids of everyone loaded."""
+    if graph is not None:
+        return graph.person_ids
+    return people.keys()
+
+
+def person_name(person_id):
+    """Returns the name of a person."""
+    if graph is not None:
+        return graph.person_names[graph.person_index[person_id]]
+    return people[person_id]["name"]
+
+
+def person_birth(person_id):
+    """Returns the birth year of a person."""
+    if graph is not None:
+        return graph.person_births[graph.person_index[person_id]]
+    return people[person_id]["birth"]
+
+
+def movie_title(movie_id):
+    """Returns the title of a movie."""
+    if graph is not None:
+        return graph.movie_titles[graph.movie_index[movie_id]]
+    return movies[movie_id]["title"]
+
+
+def build_costars(limit=None):
+    """
+    Enables the co-star adjacency used by neighbors_for_person.
+
+    With no `limit`, every person's neighbors are computed now.
+    Otherwise they are memoized as people are first expanded, until
+    `limit` (movie_id, person_id) pairs are held in total.
+    """
+    global costars, costar_limit
+    costars = {}
+    costar_limit = limit
+    costar_stats["pairs"] = 0
+    if limit is None:
+        for person_id in all_people():
+            costars[person_id] = tuple(find_neighbors(person_id))
+            costar_stats["pairs"] += len(costars[person_id])
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if costars is None:
+        return find_neighbors(person_id)
+
+    neighbors = costars.get(person_id)
+    if neighbors is None:
+        neighbors = tuple(find_neighbors(person_id))
+        if costar_limit is None or costar_stats["pairs"] + len(neighbors) <= costar_limit:
+            costars[person_id] = neighbors
+            costar_stats["pairs"] += len(neighbors)
+    return neighbors
+
+
+def find_neighbors(person_id):
+    """
+    Returns the set of (movie_id, person_id) pairs for people who
+    starred with a given person, computed from the loaded data.
+    """
+    if graph is not None:
+        return {(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in graph.neighbors(graph.person_index[person_id])}
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
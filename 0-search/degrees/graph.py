@@ -0,0 +1,632 @@
+"""
+Compact co-star graph for degrees.
+
+People and movies are interned to dense integer ids and the bipartite
+person-movie adjacency is stored in CSR form: for person i, the movies
+they starred in are person_movies[person_offsets[i]:person_offsets[i + 1]],
+and likewise movie_stars/movie_offsets for the stars of each movie.
+
+A loaded graph can be written to a binary snapshot next to the CSVs and
+memory-mapped on later runs instead of parsing the CSVs again. Strings
+are decoded from the mapping only when read, and id and name lookups
+binary search index orders stored in the snapshot, so mapping one does
+no per-person work.
+"""
+import csv
+import json
+import mmap
+import os
+import sys
+from array import array
+
+# Typecode for every integer array in the graph
+INT = "i"
+
+# Typecode of the byte offsets of the strings in a string table
+OFFSET = "q"
+
+# Snapshot layout: magic, version, header length, JSON header, then
+# 8-byte aligned sections for every string table and integer array
+SNAPSHOT_NAME = "degrees.snapshot"
+SNAPSHOT_MAGIC = b"DEGSNAP\0"
+SNAPSHOT_VERSION = 2
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+STRING_TABLES = ("person_ids", "person_names", "person_births",
+                 "movie_ids", "movie_titles", "movie_years")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+
+# Index orders: people sorted by id and by lowercase name, movies by id
+ORDERS = ("person_order", "name_order", "movie_order")
+
+
+class CompactGraph():
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_order=None, name_order=None, movie_order=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        if person_order is None:
+            person_order = sort_order(person_ids)
+            name_order = sort_order(person_names, str.lower)
+            movie_order = sort_order(movie_ids)
+        self.person_index = SortedIndex(person_ids, person_order)
+        self.people_by_name = SortedIndex(person_names, name_order, str.lower)
+        self.movie_index = SortedIndex(movie_ids, movie_order)
+
+        # Edges added after loading, which the CSR arrays cannot hold:
+        # person index -> movie indices and movie index -> person indices
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+        # Number of people expanded by the most recent search
+        self.expanded = 0
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Load people.csv, movies.csv and stars.csv from `directory`
+        straight into the compact representation.
+        """
+        person_ids, person_names, person_births = [], [], []
+        person_index = {}
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row["id"] in person_index:
+                    continue
+                person_index[row["id"]] = len(person_ids)
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        movie_index = {}
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row["id"] in movie_index:
+                    continue
+                movie_index[row["id"]] = len(movie_ids)
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        # Deduplicated (person, movie) edges, skipping unknown ids
+        edges = set()
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person = person_index.get(row["person_id"])
+                movie = movie_index.get(row["movie_id"])
+                if person is not None and movie is not None:
+                    edges.add((person, movie))
+
+        people_of = array(INT, (person for person, _ in edges))
+        movies_of = array(INT, (movie for _, movie in edges))
+        person_offsets, person_movies = build_csr(
+            len(person_ids), people_of, movies_of)
+        movie_offsets, movie_stars = build_csr(
+            len(movie_ids), movies_of, people_of)
+
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   person_offsets, person_movies, movie_offsets, movie_stars)
+
+    def save(self, path, sources):
+        """
+        Writes the graph as a snapshot to `path`, recording `sources`,
+        the stat signature of the CSVs it was built from.
+        """
+        if self.extra_movies:
+            self.merge_extras()
+        sections = []
+        for name in STRING_TABLES:
+            encoded = [string.encode("utf-8") for string in getattr(self, name)]
+            offsets = array(OFFSET, [0]) * (len(encoded) + 1)
+            for i, data in enumerate(encoded):
+                offsets[i + 1] = offsets[i] + len(data)
+            sections.append((name, b"".join(encoded)))
+            sections.append((f"{name}_offsets", offsets.tobytes()))
+        for name in ARRAYS:
+            sections.append((name, getattr(self, name).tobytes()))
+        indexes = {"person_order": self.person_index,
+                   "name_order": self.people_by_name,
+                   "movie_order": self.movie_index}
+        for name in ORDERS:
+            index = indexes[name]
+            if index.added:
+                # Keys added since loading are not in the stored order
+                index = SortedIndex(index.keys, sort_order(index.keys, index.fold))
+            sections.append((name, array(INT, index.order).tobytes()))
+
+        header = {
+            "byteorder": sys.byteorder,
+            "itemsize": array(INT).itemsize,
+            "sources": sources,
+            "people": len(self.person_ids),
+            "movies": len(self.movie_ids),
+            "sections": {},
+        }
+        # Offsets are relative to the end of the header, so they can be
+        # computed before the header length is known
+        offset = 0
+        for name, data in sections:
+            header["sections"][name] = [offset, len(data)]
+            offset = align(offset + len(data))
+        encoded = json.dumps(header).encode("utf-8")
+        start = align(len(SNAPSHOT_MAGIC) + 8 + len(encoded))
+
+        # Write to a temporary file first so readers never see half a snapshot
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(SNAPSHOT_VERSION.to_bytes(4, "little"))
+            f.write(len(encoded).to_bytes(4, "little"))
+            f.write(encoded)
+            for name, data in sections:
+                f.seek(start + header["sections"][name][0])
+                f.write(data)
+            f.truncate(start + offset)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, sources=None):
+        """
+        Maps a snapshot written by `save` into a graph without copying
+        its arrays.
+
+        Returns None if the file is not a readable snapshot of this
+        version, or if `sources` is given and does not match the stat
+        signature recorded in the snapshot.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            if int.from_bytes(f.read(4), "little") != SNAPSHOT_VERSION:
+                return None
+            length = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(length).decode("utf-8"))
+            if (header["byteorder"] != sys.byteorder
+                    or header["itemsize"] != array(INT).itemsize):
+                return None
+            if sources is not None and header["sources"] != sources:
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        start = align(len(SNAPSHOT_MAGIC) + 8 + length)
+        view = memoryview(mapped)
+
+        def section(name):
+            offset, size = header["sections"][name]
+            return view[start + offset:start + offset + size]
+
+        fields = {}
+        for name in STRING_TABLES:
+            fields[name] = StringTable(section(name), section(f"{name}_offsets").cast(OFFSET))
+        for name in ARRAYS + ORDERS:
+            fields[name] = section(name).cast(INT)
+        return cls(**fields)
+
+    def add_person(self, person_id, name, birth):
+        """Adds a person, returning their index."""
+        person = self.person_index.get(person_id)
+        if person is not None:
+            return person
+        person = len(self.person_ids)
+        self.person_index.add(person_id, person)
+        self.people_by_name.add(name, person)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        return person
+
+    def add_movie(self, movie_id, title, year):
+        """Adds a movie, returning its index."""
+        movie = self.movie_index.get(movie_id)
+        if movie is not None:
+            return movie
+        movie = len(self.movie_ids)
+        self.movie_index.add(movie_id, movie)
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        return movie
+
+    def add_star(self, person, movie):
+        """
+        Records that person index `person` starred in movie index
+        `movie`, returning False if that was already known.
+        """
+        if movie in self.movies_for(person):
+            return False
+        self.extra_movies.setdefault(person, []).append(movie)
+        self.extra_stars.setdefault(movie, []).append(person)
+        return True
+
+    def merge_extras(self):
+        """Rebuilds the CSR arrays to include every added edge."""
+        people_of, movies_of = array(INT), array(INT)
+        for person in range(len(self.person_ids)):
+            for movie in self.movies_for(person):
+                people_of.append(person)
+                movies_of.append(movie)
+        self.person_offsets, self.person_movies = build_csr(
+            len(self.person_ids), people_of, movies_of)
+        self.movie_offsets, self.movie_stars = build_csr(
+            len(self.movie_ids), movies_of, people_of)
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+    def movies_for(self, person):
+        """Returns the movie indices for person index `person`."""
+        movies = ()
+        if person + 1 < len(self.person_offsets):
+            start, end = self.person_offsets[person], self.person_offsets[person + 1]
+            movies = self.person_movies[start:end]
+        if person in self.extra_movies:
+            return list(movies) + self.extra_movies[person]
+        return movies
+
+    def stars_for(self, movie):
+        """Returns the person indices for movie index `movie`."""
+        stars = ()
+        if movie + 1 < len(self.movie_offsets):
+            start, end = self.movie_offsets[movie], self.movie_offsets[movie + 1]
+            stars = self.movie_stars[start:end]
+        if movie in self.extra_stars:
+            return list(stars) + self.extra_stars[movie]
+        return stars
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for people who starred
+        with person index `person`.
+        """
+        return [(movie, star)
+                for movie in self.movies_for(person)
+                for star in self.stars_for(movie)]
+
+    def distances(self, source):
+        """
+        Returns an array holding every person's degrees of separation
+        from person index `source`, or -1 for people it cannot reach.
+        """
+        distances = array(INT, [-1]) * len(self.person_ids)
+        seen_movies = bytearray(len(self.movie_ids))
+        distances[source] = 0
+        level = [source]
+        distance = 0
+        while level:
+            distance += 1
+            next_level = []
+            for person in level:
+                for movie in self.movies_for(person):
+                    if seen_movies[movie]:
+                        continue
+                    seen_movies[movie] = 1
+                    for star in self.stars_for(movie):
+                        if distances[star] == -1:
+                            distances[star] = distance
+                            next_level.append(star)
+            level = next_level
+        return distances
+
+    def shortest_path(self, source, target, bidirectional=False,
+                      excluded=(), banned=()):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect person index `source` to `target`.
+
+        The path passes through no one in `excluded`, and does not start
+        with any (movie, person) step in `banned`.
+
+        If no possible path, returns None.
+        """
+        self.expanded = 0
+        if source == target:
+            return []
+
+        # Per direction: the (movie, person) each reached person was
+        # reached through, None for the root, and the movies scanned.
+        # Both grow with the people reached rather than the whole graph,
+        # so short queries stay cheap
+        forward = ({source: None}, set())
+        backward = ({target: None}, set())
+        forward_level, backward_level = [source], [target]
+        backward_excluded = excluded
+        if excluded or banned:
+            forward_level = self.first_step(source, forward[0], excluded, banned)
+            if target in forward[0]:
+                return self.join(forward[0], backward[0], target)
+            # Reaching the source from the target could end on a banned step
+            backward_excluded = set(excluded)
+            backward_excluded.add(source)
+
+        # Without `bidirectional` the backward side never grows past the
+        # target, so the forward search meets it only on reaching it
+        while forward_level and backward_level:
+            if bidirectional and len(backward_level) < len(forward_level):
+                backward_level, meeting = self.expand(
+                    backward_level, backward, forward, backward_excluded)
+            else:
+                forward_level, meeting = self.expand(
+                    forward_level, forward, backward, excluded)
+            if meeting is not None:
+                return self.join(forward[0], backward[0], meeting)
+
+        # no possible path
+        return None
+
+    def first_step(self, source, parents, excluded, banned):
+        """
+        Expands person index `source` into `parents` skipping the people
+        in `excluded` and the (movie, person) steps in `banned`, and
+        returns the people reached.
+        """
+        self.expanded += 1
+        level = []
+        # Movies are not marked scanned, since people skipped here
+        # may still be reached through them from someone else
+        for movie in self.movies_for(source):
+            for star in self.stars_for(movie):
+                if star in parents or star in excluded or (movie, star) in banned:
+                    continue
+                parents[star] = (movie, source)
+                level.append(star)
+        return level
+
+    def expand(self, level, side, other, excluded=()):
+        """
+        Expands every person in `level` one step for search direction
+        `side`, skipping people in `excluded`, returning the next level
+        and a person also reached by the `other` direction, if any.
+        """
+        parents, seen_movies = side
+        other_parents = other[0]
+        next_level = []
+        meeting = None
+        for person in level:
+            self.expanded += 1
+            for movie in self.movies_for(person):
+                # Each movie only needs scanning once per direction
+                if movie in seen_movies:
+                    continue
+                seen_movies.add(movie)
+                for star in self.stars_for(movie):
+                    if star in parents or star in excluded:
+                        continue
+                    parents[star] = (movie, person)
+                    next_level.append(star)
+                    if meeting is None and star in other_parents:
+                        meeting = star
+        return next_level, meeting
+
+    def tree(self, source, limit):
+        """
+        Returns the breadth first search tree of person index `source`,
+        as a dict mapping each person it reaches to the (movie, person)
+        they were reached through, or None for `source` itself.
+
+        Returns None if the tree would hold more than `limit` people.
+        """
+        self.expanded = 0
+        parents = {source: None}
+        side = (parents, set())
+        level = [source]
+        while level:
+            level, _ = self.expand(level, side, ({}, None))
+            if len(parents) > limit:
+                return None
+        return parents
+
+    def join(self, forward, backward, meeting):
+        """
+        Builds the (movie, person) index path through person `meeting`
+        from the parent maps of a search from the source, `forward`,
+        and of one from the target, `backward`.
+        """
+        solution = []
+        person = meeting
+        while forward[person] is not None:
+            movie, parent = forward[person]
+            solution.append((movie, person))
+            person = parent
+        solution.reverse()
+
+        person = meeting
+        while backward[person] is not None:
+            movie, parent = backward[person]
+            solution.append((movie, parent))
+            person = parent
+        return solution
+
+
+class StringTable():
+    """
+    Sequence of the strings in a snapshot section, decoded on access
+    from their utf-8 bytes in `data`, where string i spans
+    data[offsets[i]:offsets[i + 1]]. Strings appended after loading
+    are kept in a list.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+        self.count = len(offsets) - 1
+        self.extra = []
+
+    def __len__(self):
+        return self.count + len(self.extra)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+            if i < 0:
+                raise IndexError("string table index out of range")
+        if i < self.count:
+            return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+        return self.extra[i - self.count]
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+        yield from self.extra
+
+    def append(self, string):
+        self.extra.append(string)
+
+
+class SortedIndex():
+    """
+    Maps keys to the indices of `keys` holding them by binary search
+    over `order`, those indices sorted by key, so the mapping can be
+    stored in a snapshot rather than rebuilt as a dict. Keys are passed
+    through `fold`, such as str.lower, if given. Keys added after
+    building are kept in a dict.
+    """
+
+    def __init__(self, keys, order, fold=None):
+        self.keys = keys
+        self.order = order
+        self.fold = fold
+        self.added = {}
+
+    def key(self, position):
+        """Returns the key at `position` in sorted order."""
+        key = self.keys[self.order[position]]
+        return key if self.fold is None else self.fold(key)
+
+    def first(self, key):
+        """Returns the first position in sorted order of a key not below `key`."""
+        keys, order, fold = self.keys, self.order, self.fold
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            probe = keys[order[middle]]
+            if fold is not None:
+                probe = fold(probe)
+            if probe < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def all(self, key):
+        """Returns every index holding `key`."""
+        indices = []
+        position = self.first(key)
+        while position < len(self.order) and self.key(position) == key:
+            indices.append(self.order[position])
+            position += 1
+        return indices + self.added.get(key, [])
+
+    def get(self, key, default=None):
+        """Returns an index holding `key`, or `default`."""
+        position = self.first(key)
+        if position < len(self.order) and self.key(position) == key:
+            return self.order[position]
+        if key in self.added:
+            return self.added[key][0]
+        return default
+
+    def __getitem__(self, key):
+        index = self.get(key)
+        if index is None:
+            raise KeyError(key)
+        return index
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def add(self, key, index):
+        """Records that `index` holds `key`."""
+        if self.fold is not None:
+            key = self.fold(key)
+        self.added.setdefault(key, []).append(index)
+
+    def distinct(self):
+        """Yields every distinct key, those built with in sorted order first."""
+        previous = None
+        for position in range(len(self.order)):
+            key = self.key(position)
+            if key != previous:
+                yield key
+                previous = key
+        yield from self.added
+
+
+def sort_order(keys, fold=None):
+    """Returns the indices of `keys` sorted by key, passed through `fold`."""
+    if fold is None:
+        return array(INT, sorted(range(len(keys)), key=keys.__getitem__))
+    return array(INT, sorted(range(len(keys)), key=lambda i: fold(keys[i])))
+
+
+def build_csr(size, rows, columns):
+    """
+    Returns (offsets, indices) arrays in CSR form for the edges
+    rows[k] -> columns[k] over `size` rows.
+    """
+    offsets = array(INT, [0]) * (size + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    indices = array(INT, [0]) * len(rows)
+    position = array(INT, offsets[:-1])
+    for row, column in zip(rows, columns):
+        indices[position[row]] = column
+        position[row] += 1
+    return offsets, indices
+
+
+def align(offset):
+    """Rounds `offset` up to the next multiple of 8."""
+    return (offset + 7) & ~7
+
+
+def source_signature(directory):
+    """
+    Returns the modification time and size of each CSV in `directory`,
+    used to detect a snapshot that is older than its data.
+    """
+    signature = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        signature[name] = [stat.st_mtime_ns, stat.st_size]
+    return signature
+
+
+def load_compact(directory, snapshot=True):
+    """
+    Returns a CompactGraph for the CSVs in `directory`.
+
+    If `snapshot` is set, an up-to-date snapshot next to the CSVs is
+    mapped instead of parsing them, and a missing or stale one is
+    rebuilt from the CSVs and written back.
+    """
+    if not snapshot:
+        return CompactGraph.from_csv(directory)
+
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    sources = source_signature(directory)
+    if os.path.exists(path):
+        graph = CompactGraph.load(path, sources)
+        if graph is not None:
+            return graph
+
+    graph = CompactGraph.from_csv(directory)
+    try:
+        graph.save(path, sources)
+    except OSError:
+        # A read-only data directory only costs the cache
+        pass
+    return graph
@@ -0,0 +1,273 @@
+"""
+Landmark (ALT) distance index for degrees.
+
+Breadth first search distances from a few hub people ("landmarks") give,
+through the triangle inequality, a lower and an upper bound on the degrees
+of separation between any two people:
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+The lower bound is an admissible, consistent heuristic for A* search.
+"""
+import csv
+from array import array
+from collections import deque
+
+from graph import INT
+
+
+class LandmarkIndex():
+
+    def __init__(self, landmarks, distances, graph=None):
+        # Landmark person_ids, and for each one the distance of every
+        # person it reaches: a dict keyed by person_id or, given the
+        # CompactGraph `graph`, an array indexed like its people with
+        # -1 for anyone unreached
+        self.landmarks = landmarks
+        self.distances = distances
+        self.graph = graph
+
+    @classmethod
+    def build(cls, people, neighbors, count=4):
+        """
+        Chooses `count` landmarks among `people` and computes their
+        distances, using `neighbors(person_id)` to expand the graph.
+
+        Landmarks are the best connected people, skipping anyone who
+        co-starred with a landmark already chosen so they stay spread out.
+        """
+        degree = {person_id: len(neighbors(person_id)) for person_id in people}
+        landmarks = choose(sorted(degree, key=degree.get, reverse=True), count,
+                           lambda p: {person for _, person in neighbors(p)})
+        distances = [bfs_distances(landmark, lambda p: [person for _, person in neighbors(p)])
+                     for landmark in landmarks]
+        return cls(landmarks, distances)
+
+    @classmethod
+    def from_graph(cls, graph, count=4):
+        """
+        Chooses `count` landmarks in a CompactGraph and computes their
+        distances with breadth first searches over its arrays.
+
+        Landmarks are the people in the most movies, skipping anyone who
+        co-starred with a landmark already chosen.
+        """
+        people = range(len(graph.person_ids))
+        ranked = sorted(people, key=lambda person: len(graph.movies_for(person)), reverse=True)
+        chosen = choose(ranked, count,
+                        lambda person: {star for _, star in graph.neighbors(person)})
+
+        landmarks = [graph.person_ids[landmark] for landmark in chosen]
+        distances = [graph.distances(landmark) for landmark in chosen]
+        return cls(landmarks, distances, graph)
+
+    def key(self, person_id):
+        """
+        Returns what the distances are keyed by for a person: their
+        index in the graph, or None if it has no such person, or else
+        the person_id itself.
+        """
+        if self.graph is None:
+            return person_id
+        return self.graph.person_index.get(person_id)
+
+    def get(self, distances, key):
+        """Returns the distance of a keyed person, or None if unreached."""
+        if self.graph is None:
+            return distances.get(key)
+        if key is None or key >= len(distances) or distances[key] == -1:
+            return None
+        return distances[key]
+
+    def set(self, distances, key, distance):
+        """Sets the distance of a keyed person."""
+        if self.graph is not None and key >= len(distances):
+            # People added since the arrays were sized are unreached
+            distances.extend(array(INT, [-1]) * (key + 1 - len(distances)))
+        distances[key] = distance
+
+    def lower_bound(self, source, target):
+        """
+        Returns a lower bound on the degrees of separation between
+        source and target, or None if a landmark proves that they
+        are not connected.
+        """
+        return lower(self.pairs(source, target))
+
+    def upper_bound(self, source, target):
+        """
+        Returns an upper bound on the degrees of separation between
+        source and target, or None if no landmark reaches both.
+        """
+        return upper(self.pairs(source, target))
+
+    def estimate(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between source and target in O(landmarks) time once the two
+        are found, without any search. Both are None if the two are
+        provably not connected.
+        """
+        pairs = self.pairs(source, target)
+        bound = lower(pairs)
+        if bound is None:
+            return None, None
+        return bound, upper(pairs)
+
+    def pairs(self, source, target):
+        """
+        Returns the distances of source and target from each landmark,
+        with None for a person it does not reach.
+        """
+        source, target = self.key(source), self.key(target)
+        return [(self.get(distances, source), self.get(distances, target))
+                for distances in self.distances]
+
+    def relax(self, people, neighbors):
+        """
+        Updates distances after edges were added at `people`, using
+        `neighbors(person_id)` to expand the graph. Added edges can only
+        shorten distances, so improvements are propagated breadth first
+        from the people whose distance dropped.
+        """
+        for distances in self.distances:
+            queue = deque()
+            for person_id in people:
+                key = self.key(person_id)
+                best = self.get(distances, key)
+                for _, neighbor in neighbors(person_id):
+                    d_neighbor = self.get(distances, self.key(neighbor))
+                    if d_neighbor is not None and (best is None or d_neighbor + 1 < best):
+                        best = d_neighbor + 1
+                if best is not None and best != self.get(distances, key):
+                    self.set(distances, key, best)
+                    queue.append(person_id)
+            while queue:
+                person_id = queue.popleft()
+                distance = self.get(distances, self.key(person_id)) + 1
+                for _, neighbor in neighbors(person_id):
+                    key = self.key(neighbor)
+                    d_neighbor = self.get(distances, key)
+                    if d_neighbor is None or d_neighbor > distance:
+                        self.set(distances, key, distance)
+                        queue.append(neighbor)
+
+    def save(self, filename):
+        """
+        Writes the index to a CSV file with a person_id column and
+        one distance column per landmark.
+        """
+        if self.graph is None:
+            people = set()
+            for distances in self.distances:
+                people.update(distances)
+            keyed = ((person_id, person_id) for person_id in people)
+        else:
+            keyed = ((person_id, person) for person, person_id in enumerate(self.graph.person_ids))
+        with open(filename, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["person_id"] + self.landmarks)
+            for person_id, key in keyed:
+                row = [self.get(distances, key) for distances in self.distances]
+                if any(distance is not None for distance in row):
+                    writer.writerow([person_id] + ["" if distance is None else distance
+                                                   for distance in row])
+
+    @classmethod
+    def load(cls, filename, graph=None):
+        """
+        Reads an index written by `save`, into arrays indexed like the
+        people of the CompactGraph `graph` if one is given. People the
+        graph does not have are skipped.
+        """
+        with open(filename, encoding="utf-8") as f:
+            reader = csv.reader(f)
+            landmarks = next(reader)[1:]
+            if graph is None:
+                distances = [{} for _ in landmarks]
+            else:
+                distances = [array(INT, [-1]) * len(graph.person_ids) for _ in landmarks]
+            index = cls(landmarks, distances, graph)
+            previous = -1
+            for row in reader:
+                key = row[0]
+                if graph is not None:
+                    # Rows saved from this graph follow its people in
+                    # order, so the next person is tried before a search
+                    following = previous + 1
+                    if following < len(graph.person_ids) and graph.person_ids[following] == key:
+                        key = following
+                    else:
+                        key = graph.person_index.get(key)
+                        if key is None:
+                            continue
+                    previous = key
+                for i, distance in enumerate(row[1:]):
+                    if distance:
+                        distances[i][key] = int(distance)
+        return index
+
+
+def lower(pairs):
+    """
+    Returns the lower bound given by (source, target) landmark
+    distances, or None if one landmark reaches only one of them.
+    """
+    bound = 0
+    for d_source, d_target in pairs:
+        if d_source is None and d_target is None:
+            continue
+        if d_source is None or d_target is None:
+            return None
+        bound = max(bound, abs(d_source - d_target))
+    return bound
+
+
+def upper(pairs):
+    """
+    Returns the upper bound given by (source, target) landmark
+    distances, or None if no landmark reaches both.
+    """
+    bound = None
+    for d_source, d_target in pairs:
+        if d_source is not None and d_target is not None:
+            if bound is None or d_source + d_target < bound:
+                bound = d_source + d_target
+    return bound
+
+
+def choose(ranked, count, costars):
+    """
+    Returns the first `count` people of `ranked` who did not co-star
+    with one chosen before them, where `costars(person)` returns the
+    set of people who co-starred with a person.
+    """
+    chosen = []
+    covered = set()
+    for person in ranked:
+        if len(chosen) == count:
+            break
+        if person in covered:
+            continue
+        chosen.append(person)
+        covered.add(person)
+        covered.update(costars(person))
+    return chosen
+
+
+def bfs_distances(source, neighbors):
+    """
+    Returns a dict mapping every person reachable from source to
+    their distance from it, where `neighbors(person_id)` returns
+    the person_ids adjacent to a person.
+    """
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        person_id = queue.popleft()
+        distance = distances[person_id] + 1
+        for neighbor in neighbors(person_id):
+            if neighbor not in distances:
+                distances[neighbor] = distance
+                queue.append(neighbor)
+    return distances
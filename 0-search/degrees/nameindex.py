@@ -0,0 +1,163 @@
+"""
+Prefix and fuzzy lookup over person names for degrees.
+
+Names are kept sorted for prefix lookups by binary search, and a trigram
+inverted index narrows fuzzy lookups down to the names sharing enough of
+the query's trigrams before any edit distance is computed. Queries too
+short for their grams to narrow anything down are compared with the
+names of similar length instead.
+"""
+import bisect
+from array import array
+from collections import Counter
+
+# Length of the grams in the inverted index
+GRAM = 3
+
+# Postings counted per fuzzy lookup beyond the fewest that find every
+# match; each narrows the names whose other grams are checked
+COUNTED_EXTRA = 2
+
+
+class NameIndex():
+
+    def __init__(self, names):
+        """
+        Builds the index over `names`, an iterable of lowercase names.
+        """
+        # Names by id, and the same names in alphabetical order
+        self.names = list(set(names))
+        self.sorted = sorted(self.names)
+        postings = {}
+        lengths = {}
+        for i, name in enumerate(self.names):
+            for gram in set(grams(name)):
+                postings.setdefault(gram, []).append(i)
+            lengths.setdefault(len(name), []).append(i)
+        self.postings = {gram: array("i", ids) for gram, ids in postings.items()}
+        self.lengths = {length: array("i", ids) for length, ids in lengths.items()}
+
+    def add(self, name):
+        """Adds one lowercase name to the index."""
+        if self.contains(name):
+            return
+        i = len(self.names)
+        self.names.append(name)
+        bisect.insort(self.sorted, name)
+        for gram in set(grams(name)):
+            self.postings.setdefault(gram, array("i")).append(i)
+        self.lengths.setdefault(len(name), array("i")).append(i)
+
+    def contains(self, name):
+        """Returns whether a lowercase name is in the index."""
+        i = bisect.bisect_left(self.sorted, name)
+        return i < len(self.sorted) and self.sorted[i] == name
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`,
+        in alphabetical order.
+        """
+        start = bisect.bisect_left(self.sorted, prefix)
+        matches = []
+        for name in self.sorted[start:start + limit]:
+            if not name.startswith(prefix):
+                break
+            matches.append(name)
+        return matches
+
+    def fuzzy(self, query, limit=10, max_distance=2):
+        """
+        Returns up to `limit` (name, distance) pairs for names within
+        `max_distance` edits of `query`, closest first.
+        """
+        # Each edit touches at most GRAM of the query's grams, so a name
+        # within d edits misses at most GRAM * d of them. A query with no
+        # more grams than that may share none, so names of a length
+        # within d of its own are compared instead
+        query_grams = set(grams(query))
+        allowed = GRAM * max_distance
+        if len(query_grams) <= allowed:
+            candidates = [i for length in range(len(query) - max_distance,
+                                                len(query) + max_distance + 1)
+                          for i in self.lengths.get(length, ())]
+        else:
+            # Such a name holds all but GRAM * d of the rarest `counted`
+            # grams, so it is found by counting their postings. Counting
+            # more than GRAM * d + 1 of them leaves fewer names to check
+            ordered = sorted(query_grams, key=lambda gram: len(self.postings.get(gram, ())))
+            counted = min(len(ordered), allowed + 1 + COUNTED_EXTRA)
+            shared = Counter()
+            for gram in ordered[:counted]:
+                shared.update(self.postings.get(gram, ()))
+            least = counted - allowed
+
+            # The commoner grams are looked for in each name left, which
+            # is dropped once it misses more than GRAM * d grams in all
+            candidates = []
+            for i, count in shared.items():
+                if count < least:
+                    continue
+                name = self.names[i]
+                if abs(len(name) - len(query)) > max_distance:
+                    continue
+                padded = f" {name} "
+                misses = counted - count
+                for gram in ordered[counted:]:
+                    if gram not in padded:
+                        misses += 1
+                        if misses > allowed:
+                            break
+                else:
+                    candidates.append(i)
+
+        matches = []
+        for i in candidates:
+            distance = edit_distance(query, self.names[i], max_distance)
+            if distance is not None:
+                matches.append((distance, self.names[i]))
+        matches.sort()
+        return [(name, distance) for distance, name in matches[:limit]]
+
+    def lookup(self, query, limit=10, max_distance=2):
+        """
+        Returns up to `limit` names matching `query`, ranked with an
+        exact match first, then names it is a prefix of, then names
+        within `max_distance` edits. An exact match means the query was
+        not mistyped, so only a query without one is looked up fuzzily,
+        and only if the prefix matches left room under `limit`.
+        """
+        query = query.lower()
+        ranked = self.prefix(query, limit)
+        if len(ranked) == limit or (ranked and ranked[0] == query):
+            return ranked
+        for name, _ in self.fuzzy(query, limit, max_distance):
+            if name not in ranked:
+                ranked.append(name)
+        return ranked[:limit]
+
+
+def grams(name):
+    """Returns the trigrams of a name padded at both ends."""
+    padded = f" {name} "
+    return [padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)]
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Returns the Levenshtein distance between a and b, or None if it
+    is more than `max_distance`.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
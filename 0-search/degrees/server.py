@@ -0,0 +1,180 @@
+import json
+import os
+import socketserver
+import stat
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+# Latencies kept per endpoint for percentile reporting
+LATENCY_WINDOW = 10000
+
+# Percentiles reported by /stats
+PERCENTILES = (50, 90, 99)
+
+
+def main():
+    usage = "Usage: python server.py directory [port|socket]"
+    if len(sys.argv) not in (2, 3):
+        sys.exit(usage)
+    directory = sys.argv[1]
+    address = sys.argv[2] if len(sys.argv) == 3 else "8000"
+
+    # Anything like a mistyped port is refused rather than taken as a
+    # socket path, and only a stale socket is ever removed
+    if address.isdigit():
+        if not 0 < int(address) < 65536:
+            sys.exit(f"Port {address} out of range. {usage}")
+    elif address[:1].isdigit() or ":" in address:
+        sys.exit(f"{address} is neither a port nor a socket path. {usage}")
+    elif os.path.exists(address) and not stat.S_ISSOCK(os.stat(address).st_mode):
+        sys.exit(f"{address} exists and is not a socket. {usage}")
+
+    # Load data once and keep it resident for every request
+    print("Loading data...")
+    degrees.load_data(directory, compact=True, index_names=True)
+    degrees.build_components()
+    degrees.build_name_index()
+    print("Data loaded.")
+
+    if address.isdigit():
+        server = ThreadingHTTPServer(("127.0.0.1", int(address)), Handler)
+        print(f"Serving on http://127.0.0.1:{address}")
+    else:
+        if os.path.exists(address):
+            os.remove(address)
+        server = UnixHTTPServer(address, Handler)
+        print(f"Serving on unix socket {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class Latencies():
+    """
+    Thread-safe record of the most recent request latencies per endpoint.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.counts = {}
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            if endpoint not in self.samples:
+                self.samples[endpoint] = deque(maxlen=LATENCY_WINDOW)
+                self.counts[endpoint] = 0
+            self.samples[endpoint].append(seconds)
+            self.counts[endpoint] += 1
+
+    def summary(self):
+        """
+        Returns, per endpoint, the request count and latency
+        percentiles in milliseconds over the recent window.
+        """
+        with self.lock:
+            samples = {endpoint: sorted(s) for endpoint, s in self.samples.items()}
+            counts = dict(self.counts)
+        summary = {}
+        for endpoint, latencies in samples.items():
+            summary[endpoint] = {"count": counts[endpoint]}
+            for p in PERCENTILES:
+                rank = max(0, -(-p * len(latencies) // 100) - 1)
+                summary[endpoint][f"p{p}_ms"] = round(latencies[rank] * 1000, 3)
+        return summary
+
+
+latencies = Latencies()
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        routes = {
+            "/path": path,
+            "/people": people,
+            "/stats": stats,
+        }
+        if url.path not in routes:
+            self.reply(404, {"error": "Not found."})
+            return
+        try:
+            status, body = routes[url.path](query)
+        except KeyError as e:
+            status, body = 400, {"error": f"Missing parameter {e}."}
+        except ValueError:
+            status, body = 400, {"error": "Invalid parameter."}
+        self.reply(status, body)
+        latencies.record(url.path, time.perf_counter() - start)
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket clients have no host to report
+        return self.client_address[0] if self.client_address else "unix"
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def path(query):
+    """
+    Answers /path?source=ID&target=ID with the shortest path between
+    two person_ids.
+    """
+    source, target = query["source"], query["target"]
+    for person_id in (source, target):
+        if person_id not in degrees.graph.person_index:
+            return 404, {"error": f"Person {person_id} not found."}
+
+    steps = degrees.shortest_path(source, target, bidirectional=True)
+    if steps is None:
+        return 200, {"source": source, "target": target, "degrees": None, "path": None}
+    return 200, {
+        "source": source,
+        "target": target,
+        "degrees": len(steps),
+        "path": [{
+            "movie_id": movie_id,
+            "title": degrees.movie_title(movie_id),
+            "person_id": person_id,
+            "name": degrees.person_name(person_id),
+        } for movie_id, person_id in steps],
+    }
+
+
+def people(query):
+    """
+    Answers /people?name=NAME[&limit=N] with ranked candidate people.
+    """
+    limit = int(query.get("limit", 10))
+    return 200, [{"person_id": person_id, "name": name, "birth": birth}
+                 for person_id, name, birth in degrees.find_people(query["name"], limit)]
+
+
+def stats(query):
+    """Answers /stats with per-endpoint latency percentiles."""
+    return 200, latencies.summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Generates synthetic people.csv, movies.csv and stars.csv files shaped
+like the IMDb data degrees expects, at any scale.
+
+Cast sizes follow a power law, and a few prolific people appear in many
+movies while most appear in one or two, like the real co-star graph.
+"""
+import csv
+import os
+import random
+import sys
+
+# Pareto shape of cast sizes; smaller means heavier tails
+CAST_SHAPE = 1.6
+
+# Largest cast of any one movie
+MAX_CAST = 200
+
+# Skew of how often people are cast; larger favors a few stars more
+POPULARITY_SKEW = 2.5
+
+# Movies per person
+MOVIE_RATIO = 0.4
+
+SYLLABLES = ["ka", "ren", "mo", "li", "sa", "to", "vin", "del", "ra", "ne",
+             "jo", "ber", "an", "el", "mar", "ty", "son", "lo", "chi", "va"]
+
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python synthetic.py directory people [seed]")
+    directory = sys.argv[1]
+    people = int(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else 0
+
+    counts = generate(directory, people, seed)
+    print(f"Wrote {counts['people']} people, {counts['movies']} movies "
+          f"and {counts['stars']} stars to {directory}")
+
+
+def generate(directory, people, seed=0):
+    """
+    Writes a synthetic dataset of `people` people to `directory`,
+    returning the number of rows written to each file.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    movies = max(1, int(people * MOVIE_RATIO))
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(people):
+            name = f"{word(rng).capitalize()} {word(rng).capitalize()}"
+            writer.writerow([person + 1, name, rng.randint(1920, 2005)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(movies):
+            title = " ".join(word(rng).capitalize() for _ in range(rng.randint(1, 3)))
+            writer.writerow([movie + 1, title, rng.randint(1930, 2023)])
+
+    stars = 0
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(movies):
+            size = min(MAX_CAST, int(rng.paretovariate(CAST_SHAPE)) + 1)
+            cast = set()
+            for _ in range(size):
+                # Low ids are the popular people
+                cast.add(int(people * rng.random() ** POPULARITY_SKEW))
+            for person in cast:
+                writer.writerow([person + 1, movie + 1])
+            stars += len(cast)
+
+    return {"people": people, "movies": movies, "stars": stars}
+
+
+def word(rng):
+    """Returns a random pronounceable word."""
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import random
+import unittest
+
+from nameindex import NameIndex, edit_distance
+from synthetic import SYLLABLES
+
+
+def synthetic_names(count, rng):
+    """Returns `count` names built from syllables, which share many grams."""
+    def part():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+    return [f"{part()} {part()}" for _ in range(count)]
+
+
+class FuzzyTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = random.Random(0)
+        cls.index = NameIndex(synthetic_names(20000, cls.rng))
+
+    def test_one_edit_finds_source(self):
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        for _ in range(40):
+            name = self.rng.choice(self.index.sorted)
+            i = self.rng.randrange(len(name))
+            query = name[:i] + self.rng.choice(letters) + name[i + 1:]
+            if query == name:
+                continue
+            # Every name one edit away is returned, however many tie
+            close = [n for n in self.index.names if edit_distance(query, n, 1) is not None]
+            found = [n for n, _ in self.index.fuzzy(query, len(close), 1)]
+            self.assertIn(name, found, query)
+            self.assertEqual(sorted(found), sorted(close), query)
+
+    def test_lookup_returns_source_with_room(self):
+        index = NameIndex(["chika tysa", "chidel tysa", "chira tysa", "marvin son"])
+        self.assertIn("chira tysa", index.lookup("chida tysa"))
+
+    def test_short_query(self):
+        self.assertEqual(NameIndex(["tim", "al"]).fuzzy("tom"), [("tim", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,8 @@
+import heapq
+import itertools
+from collections import OrderedDict, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +12,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Maps each state in the frontier to the number of nodes holding it
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +30,18 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node)
             return node
 
+    def discard(self, node):
+        """Drops one occurrence of a removed node's state."""
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +49,142 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node)
+            return node
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that always removes the node with the lowest priority,
+    as given by `priority(node)`. Ties are removed in insertion order.
+    """
+
+    def __init__(self, priority):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority
+        self.counter = itertools.count()
+
+    def add(self, node):
+        entry = (self.priority(node), next(self.counter), node)
+        heapq.heappush(self.frontier, entry)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            _, _, node = heapq.heappop(self.frontier)
+            self.discard(node)
             return node
+
+
+class DisjointSet():
+    """
+    Union-find over hashable items, with path halving and union by size.
+    Items never added are treated as singletons.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        parent = self.parent
+        if item not in parent:
+            return item
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        for item in (a, b):
+            if item not in self.parent:
+                self.parent[item] = item
+                self.size[item] = 1
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+        return a
+
+    def connected(self, a, b):
+        return a == b or self.find(a) == self.find(b)
+
+    def component_size(self, item):
+        return self.size.get(self.find(item), 1)
+
+
+class TreeCache():
+    """
+    Least recently used cache of search trees, keyed by their root.
+    Each tree is a dict keyed by the people it reaches, and the cache
+    holds at most `max_nodes` entries across all trees.
+
+    Trees are only worth building for roots that are searched from
+    again, so the cache also remembers the last `history` roots that
+    missed, and whether their trees turned out too large to hold.
+    """
+
+    def __init__(self, max_nodes, history=1024):
+        self.max_nodes = max_nodes
+        self.history = history
+        self.trees = OrderedDict()
+        self.missed = OrderedDict()
+        self.nodes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, root):
+        """Returns the cached tree for root, or None, counting the lookup."""
+        tree = self.trees.get(root)
+        if tree is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.trees.move_to_end(root)
+        return tree
+
+    def __contains__(self, root):
+        return root in self.trees
+
+    def admit(self, root):
+        """
+        Records a miss for root, returning True if it missed before and
+        its tree is not known to be too large, so it should be built.
+        """
+        if root in self.missed:
+            self.missed.move_to_end(root)
+            return not self.missed[root]
+        self.missed[root] = False
+        if len(self.missed) > self.history:
+            self.missed.popitem(last=False)
+        return False
+
+    def reject(self, root):
+        """Records that root's tree holds more than max_nodes entries."""
+        self.missed[root] = True
+        self.missed.move_to_end(root)
+
+    def put(self, root, tree):
+        """Caches a tree, evicting the least recently used ones to fit."""
+        if len(tree) > self.max_nodes:
+            self.reject(root)
+            return
+        self.missed.pop(root, None)
+        if root in self.trees:
+            self.nodes -= len(self.trees.pop(root))
+        while self.trees and self.nodes + len(tree) > self.max_nodes:
+            _, evicted = self.trees.popitem(last=False)
+            self.nodes -= len(evicted)
+        self.trees[root] = tree
+        self.nodes += len(tree)
+
+    def clear(self):
+        self.trees.clear()
+        self.nodes = 0
@@ -0,0 +1,240 @@
+"""
+Monte Carlo Tree Search (UCT) player for boards too large to solve.
+
+Each iteration walks down the tree choosing children by their upper
+confidence bound, adds one new child, plays random moves from it to the
+end of the game and credits the result to every node on the way back up.
+The most visited move at the root is played.
+
+The search uses a game's player, actions, result, terminal and utility
+functions, so it plays the tictactoe module and mnk.Game boards alike.
+Random moves are played by the game's rollout function when it has
+one, as both of those do, which plays them on bitmasks instead of
+copying boards; otherwise they are played through result. The tree is
+kept between moves, so the positions explored for one move are reused
+for the next. With more than one worker, independent searches run in
+parallel processes and their root visit counts are summed before
+choosing.
+"""
+import importlib
+import math
+import multiprocessing
+import random
+import time
+import types
+
+# Seconds the AI may think per move
+MOVE_BUDGET = 1.0
+
+# Weight of exploring rarely visited moves against exploiting good ones
+EXPLORATION = math.sqrt(2)
+
+
+class Node():
+
+    __slots__ = ("board", "action", "parent", "children", "untried",
+                 "mover", "visits", "reward")
+
+    def __init__(self, game, board, action=None, parent=None):
+        self.board = board
+        self.action = action
+        self.parent = parent
+        self.children = []
+        self.untried = [] if game.terminal(board) else list(game.actions(board))
+        # The player who made the move into this node, credited with its reward
+        self.mover = None if parent is None else game.player(parent.board)
+        self.visits = 0
+        self.reward = 0.0
+
+
+class MCTS():
+
+    def __init__(self, game, iterations=None, budget=MOVE_BUDGET, workers=1,
+                 exploration=EXPLORATION, seed=None):
+        """
+        Searches `game` for at most `iterations` iterations or `budget`
+        seconds per move, whichever runs out first; either may be None.
+        """
+        if iterations is None and budget is None:
+            raise ValueError("iterations or budget must be given")
+        self.game = game
+        self.rollout = getattr(game, "rollout", None)
+        self.iterations = iterations
+        self.budget = budget
+        self.workers = workers
+        self.exploration = exploration
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.root = None
+        self.pool = None
+        self.stats = {"iterations": 0, "reused": 0}
+
+    def choose(self, board, cancel=None):
+        """
+        Returns the best action found for the current player. Setting
+        the threading.Event `cancel` ends the search early.
+
+        Returns None if board is terminal.
+        """
+        if self.game.terminal(board):
+            return None
+        self.root = self.find(board)
+        self.stats["reused"] = self.root.visits
+
+        if self.workers > 1:
+            jobs = self.parallel(board)
+            self.stats["iterations"] = self.run(self.root, cancel)
+            visits = {child.action: child.visits for child in self.root.children}
+            for counts in jobs.get():
+                for action, count in counts.items():
+                    visits[action] = visits.get(action, 0) + count
+        else:
+            self.stats["iterations"] = self.run(self.root, cancel)
+            visits = {child.action: child.visits for child in self.root.children}
+
+        if visits:
+            action = max(visits, key=visits.get)
+        else:
+            # Cancelled or out of budget before a single iteration
+            action = self.rng.choice(self.root.untried)
+
+        # Keep the subtree under the chosen move for the next search
+        for child in self.root.children:
+            if child.action == action:
+                self.root = child
+                child.parent = None
+                break
+        else:
+            self.root = None
+        return action
+
+    def find(self, board):
+        """
+        Returns the node of `board` if the kept tree reaches it within
+        two moves, or a new root otherwise.
+        """
+        if self.root is not None:
+            if self.root.board == board:
+                return self.root
+            for child in self.root.children:
+                if child.board == board:
+                    child.parent = None
+                    return child
+                for grandchild in child.children:
+                    if grandchild.board == board:
+                        grandchild.parent = None
+                        return grandchild
+        return Node(self.game, board)
+
+    def run(self, root, cancel=None):
+        """Runs iterations from `root` until a limit is reached."""
+        deadline = math.inf if self.budget is None else time.perf_counter() + self.budget
+        limit = math.inf if self.iterations is None else self.iterations
+        count = 0
+        while count < limit and time.perf_counter() < deadline:
+            if cancel is not None and cancel.is_set():
+                break
+            self.iterate(root)
+            count += 1
+        return count
+
+    def iterate(self, root):
+        """Runs one selection, expansion, rollout and backup."""
+        game = self.game
+
+        # Select a node with untried moves, or a terminal one
+        node = root
+        while not node.untried and node.children:
+            node = self.select(node)
+
+        # Expand one untried move
+        if node.untried:
+            i = self.rng.randrange(len(node.untried))
+            node.untried[i], node.untried[-1] = node.untried[-1], node.untried[i]
+            action = node.untried.pop()
+            child = Node(game, game.result(node.board, action), action, node)
+            node.children.append(child)
+            node = child
+
+        # Play random moves to the end of the game
+        if self.rollout is not None:
+            utility = self.rollout(node.board, self.rng)
+        else:
+            board = node.board
+            while not game.terminal(board):
+                board = game.result(board, self.rng.choice(game.actions(board)))
+            utility = game.utility(board)
+
+        # Credit each node's mover with a win, loss or half for a draw
+        while node is not None:
+            node.visits += 1
+            if node.mover == game.X:
+                node.reward += (1 + utility) / 2
+            elif node.mover == game.O:
+                node.reward += (1 - utility) / 2
+            node = node.parent
+
+    def select(self, node):
+        """Returns the child of `node` with the highest upper confidence bound."""
+        log_visits = math.log(node.visits)
+        best, best_score = None, -math.inf
+        for child in node.children:
+            score = (child.reward / child.visits
+                     + self.exploration * math.sqrt(log_visits / child.visits))
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def parallel(self, board):
+        """
+        Starts independent searches of `board` in the pool's processes,
+        returning an AsyncResult of each one's root visit counts.
+        """
+        if self.pool is None:
+            context = multiprocessing.get_context(
+                "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+            )
+            self.pool = context.Pool(self.workers - 1, initializer=initialize,
+                                     initargs=(spec(self.game),))
+        seed = self.rng.randrange(1 << 32)
+        jobs = [(board, self.iterations, self.budget, self.exploration, seed + worker)
+                for worker in range(self.workers - 1)]
+        return self.pool.map_async(search, jobs)
+
+    def close(self):
+        """Stops the worker processes, if any were started."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+
+def spec(game):
+    """
+    Returns what a worker process needs to recreate `game`: the name
+    of a game module, or a picklable game object itself.
+    """
+    return game.__name__ if isinstance(game, types.ModuleType) else game
+
+
+worker_game = None
+
+
+def initialize(game_spec):
+    """Sets up the game a worker process searches."""
+    global worker_game
+    if isinstance(game_spec, str):
+        worker_game = importlib.import_module(game_spec)
+    else:
+        worker_game = game_spec
+
+
+def search(job):
+    """
+    Searches a board in a worker process, returning the visit count of
+    each root action.
+    """
+    board, iterations, budget, exploration, seed = job
+    searcher = MCTS(worker_game, iterations, budget, exploration=exploration, seed=seed)
+    root = Node(worker_game, board)
+    searcher.run(root)
+    return {child.action: child.visits for child in root.children}
@@ -0,0 +1,419 @@
+"""
+Generalized m,n,k-game player: an m by n board where k in a row wins.
+
+Boards larger than 3x3 cannot be solved exhaustively, so the AI runs an
+iterative-deepening alpha-beta (negamax) search with a transposition
+table and a heuristic evaluation, and stops when its time budget runs
+out, playing the best move of the deepest completed iteration.
+
+A Game exposes the same functions as the tictactoe module, so either
+can drive runner.py.
+"""
+import math
+import time
+
+from symmetry import Symmetries
+
+# Seconds the AI may think per move
+MOVE_BUDGET = 1.0
+
+# Nodes searched between checks of the clock
+CLOCK_INTERVAL = 1024
+
+# Score of a win, well above any heuristic evaluation; wins found
+# sooner score higher so the AI does not dawdle
+WIN = 1 << 40
+
+# More moves than any board holds; scores within this of WIN are forced
+# wins or losses, counted in plies
+MAX_PLY = 1 << 16
+
+# Transposition table entry kinds
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Transposition table entries kept before it is cleared
+TABLE_SIZE = 1 << 20
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Game():
+
+    X = "X"
+    O = "O"
+    EMPTY = None
+
+    def __init__(self, m=3, n=3, k=3):
+        if not 1 <= k <= max(m, n):
+            raise ValueError(f"k must be between 1 and {max(m, n)}")
+        self.m, self.n, self.k = m, n, k
+        self.size = m * n
+        self.full = (1 << self.size) - 1
+
+        # Masks of every k-in-a-row line, and the lines through each cell
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(sum(
+                            1 << self.cell(i + di * s, j + dj * s) for s in range(k)))
+        self.lines_through = [[line for line in self.lines if line >> cell & 1]
+                              for cell in range(self.size)]
+
+        # Cells next to each cell, including diagonally
+        self.neighbors = []
+        for i in range(m):
+            for j in range(n):
+                mask = 0
+                for di in (-1, 0, 1):
+                    for dj in (-1, 0, 1):
+                        if 0 <= i + di < m and 0 <= j + dj < n:
+                            mask |= 1 << self.cell(i + di, j + dj)
+                self.neighbors.append(mask)
+
+        # Cells from the center outwards, the order moves are tried in
+        center_i, center_j = (m - 1) / 2, (n - 1) / 2
+        self.center_order = sorted(
+            range(self.size),
+            key=lambda c: abs(c // n - center_i) + abs(c % n - center_j))
+
+        # Heuristic value of a line holding only one player's marks
+        self.weights = [0] + [10 ** count for count in range(k)]
+
+        # Transposition table mapping the canonical image of each position,
+        # shared by its rotations and reflections, to a search result
+        self.symmetries = Symmetries(m, n)
+        self.table = {}
+        # Marks on the board at the last search, to notice a new game
+        self.marks = 0
+        self.stats = {"nodes": 0, "depth": 0}
+        self.deadline = math.inf
+        self.cancel = None
+
+    def cell(self, i, j):
+        """Returns the bit index of cell (i, j)."""
+        return i * self.n + j
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[self.EMPTY] * self.n for _ in range(self.m)]
+
+    def to_bits(self, board):
+        """
+        Returns the (x, o) masks of the cells each player has marked.
+        """
+        x = o = 0
+        bit = 1
+        for row in board:
+            for cell in row:
+                if cell == self.X:
+                    x |= bit
+                elif cell == self.O:
+                    o |= bit
+                bit <<= 1
+        return x, o
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = self.to_bits(board)
+        return self.X if marks(x) <= marks(o) else self.O
+
+    def actions(self, board):
+        """
+        Returns all possible actions (i, j) available on the board.
+        """
+        return [(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == self.EMPTY]
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != self.EMPTY:
+            raise ValueError(f"invalid action {action}")
+        new_board = [list(row) for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.to_bits(board)
+        if self.complete(x):
+            return self.X
+        if self.complete(o):
+            return self.O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.to_bits(board)
+        return self.complete(x) or self.complete(o) or x | o == self.full
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        return 1 if winner == self.X else -1 if winner == self.O else 0
+
+    def rollout(self, board, rng):
+        """
+        Plays random moves from the board to the end of the game, using
+        bitmasks rather than board copies, and returns its utility.
+        """
+        x, o = self.to_bits(board)
+        if self.complete(x):
+            return 1
+        if self.complete(o):
+            return -1
+        occupied = x | o
+        cells = [cell for cell in range(self.size) if not occupied >> cell & 1]
+        rng.shuffle(cells)
+        # Only the mover's lines through the cell just played can complete
+        if marks(x) <= marks(o):
+            me, them, sign = x, o, 1
+        else:
+            me, them, sign = o, x, -1
+        for cell in cells:
+            me |= 1 << cell
+            for line in self.lines_through[cell]:
+                if me & line == line:
+                    return sign
+            me, them, sign = them, me, -sign
+        return 0
+
+    def minimax(self, board, budget=MOVE_BUDGET, max_depth=None, cancel=None):
+        """
+        Returns the best action found for the current player within
+        `budget` seconds, searching at most `max_depth` moves ahead.
+        Setting the threading.Event `cancel` ends the search early, as
+        if the budget had run out.
+
+        Returns None if board is terminal.
+        """
+        if self.terminal(board):
+            return None
+        x, o = self.to_bits(board)
+        if marks(x) <= marks(o):
+            me, them = x, o
+        else:
+            me, them = o, x
+        self.cancel = cancel
+        try:
+            move = self.search(me, them, budget, max_depth)
+        finally:
+            self.cancel = None
+        return divmod(move, self.n)
+
+    def complete(self, mask):
+        """Returns whether a player's mask holds a complete line."""
+        return any(mask & line == line for line in self.lines)
+
+    def search(self, me, them, budget, max_depth=None):
+        """
+        Runs iterative deepening from the position where the player with
+        mask `me` is to move, returning the best cell found in time.
+        """
+        self.stats["nodes"] = 0
+        self.stats["depth"] = 0
+        self.deadline = time.perf_counter() + budget
+        played = marks(me | them)
+        remaining = self.size - played
+
+        # Positions of an earlier game are never reached again, and the
+        # table is bounded so a long session cannot grow it without end
+        if played < self.marks or len(self.table) > TABLE_SIZE:
+            self.table.clear()
+        self.marks = played
+        if max_depth is None or max_depth > remaining:
+            max_depth = remaining
+
+        # Any legal move, in case not even depth 1 completes
+        best = self.candidates(me, them)[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self.root(me, them, depth)
+            except SearchTimeout:
+                break
+            best = move
+            self.stats["depth"] = depth
+            if abs(score) >= WIN - self.size:
+                # A forced win or loss was found; deeper search won't change it
+                break
+        self.deadline = math.inf
+        return best
+
+    def root(self, me, them, depth):
+        """
+        Searches every root move to `depth`, returning the best
+        (score, cell).
+        """
+        alpha, beta = -math.inf, math.inf
+        key, symmetry = self.key(me, them)
+        best_score, best_move = -math.inf, None
+        for cell in self.ordered(me, them, self.table.get(key), symmetry):
+            score = self.play(me, them, cell, depth, alpha, beta, 1)
+            if score > best_score:
+                best_score, best_move = score, cell
+            alpha = max(alpha, score)
+        self.store(key, symmetry, depth, best_score, EXACT, best_move, 1)
+        return best_score, best_move
+
+    def play(self, me, them, cell, depth, alpha, beta, ply):
+        """
+        Returns the score, for the player with mask `me`, of playing
+        `cell` and searching the reply to `depth` - 1.
+        """
+        me |= 1 << cell
+        for line in self.lines_through[cell]:
+            if me & line == line:
+                return WIN - ply
+        if me | them == self.full:
+            return 0
+        return -self.negamax(them, me, depth - 1, -beta, -alpha, ply + 1)
+
+    def negamax(self, me, them, depth, alpha, beta, ply):
+        """
+        Returns the alpha-beta score of the position for the player
+        with mask `me`, who is to move.
+        """
+        self.stats["nodes"] += 1
+        if self.stats["nodes"] % CLOCK_INTERVAL == 0 and (
+                time.perf_counter() > self.deadline
+                or self.cancel is not None and self.cancel.is_set()):
+            raise SearchTimeout
+
+        if depth == 0:
+            return self.evaluate(me, them)
+
+        key, symmetry = self.key(me, them)
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            stored_depth, score, kind, _ = entry
+            score = from_table(score, ply)
+            if kind == EXACT:
+                return score
+            if kind == LOWER and score >= beta:
+                return score
+            if kind == UPPER and score <= alpha:
+                return score
+
+        original_alpha = alpha
+        best_score, best_move = -math.inf, None
+        for cell in self.ordered(me, them, entry, symmetry):
+            score = self.play(me, them, cell, depth, alpha, beta, ply)
+            if score > best_score:
+                best_score, best_move = score, cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            kind = UPPER
+        elif best_score >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        self.store(key, symmetry, depth, best_score, kind, best_move, ply)
+        return best_score
+
+    def key(self, me, them):
+        """
+        Returns the transposition table key of a position and the
+        symmetry that maps it onto its canonical image.
+        """
+        me, them, symmetry = self.symmetries.canonical(me, them)
+        return (me, them), symmetry
+
+    def store(self, key, symmetry, depth, score, kind, move, ply):
+        """
+        Stores a search result of the position whose moves are made at
+        `ply`, with its move in the canonical image.
+        """
+        self.table[key] = (depth, to_table(score, ply), kind,
+                           self.symmetries.forward[symmetry][move])
+
+    def ordered(self, me, them, entry, symmetry):
+        """
+        Returns candidate cells with the best move of the position's
+        transposition table `entry`, if any, first.
+        """
+        cells = self.candidates(me, them)
+        if entry is not None:
+            move = self.symmetries.inverse[symmetry][entry[3]]
+            if move in cells:
+                cells.remove(move)
+                cells.insert(0, move)
+        return cells
+
+    def candidates(self, me, them):
+        """
+        Returns the empty cells worth searching, center first: those next
+        to a mark on boards larger than 3x3, or every empty cell otherwise.
+        """
+        occupied = me | them
+        if self.size > 9 and occupied:
+            near = 0
+            for cell in range(self.size):
+                if occupied >> cell & 1:
+                    near |= self.neighbors[cell]
+        else:
+            near = self.full
+        return [cell for cell in self.center_order
+                if near >> cell & 1 and not occupied >> cell & 1]
+
+    def evaluate(self, me, them):
+        """
+        Returns a heuristic score of the position for the player with
+        mask `me`: lines only one player can still complete count for
+        that player, more so the more of the line they hold.
+        """
+        score = 0
+        for line in self.lines:
+            mine = me & line
+            theirs = them & line
+            if mine and not theirs:
+                score += self.weights[marks(mine)]
+            elif theirs and not mine:
+                score -= self.weights[marks(theirs)]
+        return score
+
+
+def marks(mask):
+    """Returns the number of cells marked in `mask`."""
+    return bin(mask).count("1")
+
+
+def to_table(score, ply):
+    """
+    Converts a score counting plies from the root into one counting
+    from the position whose moves are made at `ply`, so a forced win
+    found through one move order is valid when reached through another.
+    """
+    if score >= WIN - MAX_PLY:
+        return score + ply - 1
+    if score <= MAX_PLY - WIN:
+        return score - ply + 1
+    return score
+
+
+def from_table(score, ply):
+    """Converts a stored score back into one counting plies from the root."""
+    if score >= WIN - MAX_PLY:
+        return score - ply + 1
+    if score <= MAX_PLY - WIN:
+        return score + ply - 1
+    return score
@@ -1,8 +1,30 @@
 import pygame
 import sys
+import threading
 import time
-
-import tictactoe as ttt
+from concurrent.futures import ThreadPoolExecutor
+
+import mcts
+import mnk
+import tictactoe
+
+# Play 3x3 tic-tac-toe, or an m,n,k-game given as arguments, against
+# minimax or, with a trailing "mcts" argument, Monte Carlo Tree Search
+args = sys.argv[1:]
+use_mcts = bool(args) and args[-1] == "mcts"
+if use_mcts:
+    args = args[:-1]
+if len(args) == 3:
+    rows, cols, k = (int(arg) for arg in args)
+    ttt = mnk.Game(rows, cols, k)
+    title_text = f"Play {k} in a Row"
+elif not args:
+    rows, cols = 3, 3
+    ttt = tictactoe
+    title_text = "Play Tic-Tac-Toe"
+else:
+    sys.exit("Usage: python runner.py [m n k] [mcts]")
+engine = mcts.MCTS(ttt) if use_mcts else None
 
 pygame.init()
 size = width, height = 600, 400
@@ -15,16 +37,54 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Fit the board between the title and the bottom button
+tile_size = min(80, 260 // max(rows, cols))
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
+
+# Seconds the AI appears to think, even when its move is instant
+AI_DELAY = 0.5
+
+# Frames drawn per second; capping them leaves the AI thread more time
+FPS = 30
+clock = pygame.time.Clock()
+
+# The AI searches on a worker thread, so the window keeps drawing and
+# handling events; its move is applied once the future resolves
+executor = ThreadPoolExecutor(max_workers=1)
+ai_future = None
+ai_cancel = None
+ai_started = 0
+
+
+def think(board, cancel):
+    """Returns the AI's move, stopping early if `cancel` is set."""
+    if engine is not None:
+        return engine.choose(board, cancel)
+    if isinstance(ttt, mnk.Game):
+        return ttt.minimax(board, cancel=cancel)
+    return ttt.minimax(board)
+
+
+def cancel_ai():
+    """Abandons any AI search in progress."""
+    global ai_future, ai_cancel
+    if ai_future is not None:
+        ai_cancel.set()
+        ai_future.cancel()
+    ai_future = None
+    ai_cancel = None
+
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai()
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
     screen.fill(black)
@@ -33,7 +93,7 @@ while True:
     if user is None:
 
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
+        title = largeFont.render(title_text, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 50)
         screen.blit(title, titleRect)
@@ -67,13 +127,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -102,7 +161,8 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (int(time.time() * 3) % 3 + 1)
+            title = f"Computer thinking{dots}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
@@ -110,20 +170,21 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if ai_future is None:
+                ai_cancel = threading.Event()
+                ai_future = executor.submit(think, board, ai_cancel)
+                ai_started = time.time()
+            elif ai_future.done() and time.time() - ai_started >= AI_DELAY:
+                move = ai_future.result()
+                ai_future = None
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -139,8 +200,9 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    cancel_ai()
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
 
     pygame.display.flip()
+    clock.tick(FPS)
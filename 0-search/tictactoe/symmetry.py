@@ -0,0 +1,85 @@
+"""
+Board symmetries for position caches.
+
+Rotating or reflecting a position does not change its value, so caches
+can store each position once under a canonical form: the smallest of its
+symmetric images. A square board has the 8 symmetries of the dihedral
+group; other rectangles only have the 4 that keep their shape.
+
+Masks are transformed with precomputed tables, one per symmetry and
+8-bit chunk of the mask, so mapping a mask costs a lookup per chunk.
+"""
+
+# Bits of a mask transformed per table lookup
+CHUNK = 8
+CHUNK_MASK = (1 << CHUNK) - 1
+
+
+class Symmetries():
+
+    def __init__(self, m, n):
+        self.m, self.n = m, n
+        size = m * n
+        transforms = [
+            lambda i, j: (i, j),
+            lambda i, j: (m - 1 - i, j),
+            lambda i, j: (i, n - 1 - j),
+            lambda i, j: (m - 1 - i, n - 1 - j),
+        ]
+        if m == n:
+            transforms += [
+                lambda i, j: (j, i),
+                lambda i, j: (n - 1 - j, i),
+                lambda i, j: (j, m - 1 - i),
+                lambda i, j: (n - 1 - j, m - 1 - i),
+            ]
+
+        # Where each cell goes under each symmetry, and back again
+        self.forward = []
+        self.inverse = []
+        for transform in transforms:
+            forward = [0] * size
+            for cell in range(size):
+                i, j = transform(*divmod(cell, n))
+                forward[cell] = i * n + j
+            inverse = [0] * size
+            for cell, image in enumerate(forward):
+                inverse[image] = cell
+            self.forward.append(forward)
+            self.inverse.append(inverse)
+
+        # tables[s][c][bits] is the image under symmetry s of the mask
+        # holding `bits` in chunk c
+        chunks = range(0, size, CHUNK)
+        self.tables = []
+        for forward in self.forward:
+            tables = []
+            for start in chunks:
+                table = [0] * (1 << CHUNK)
+                for bits in range(1 << CHUNK):
+                    image = 0
+                    for offset in range(CHUNK):
+                        if bits >> offset & 1 and start + offset < size:
+                            image |= 1 << forward[start + offset]
+                    table[bits] = image
+                tables.append((start, table))
+            self.tables.append(tables)
+
+    def transform(self, mask, symmetry):
+        """Returns the image of a mask under a symmetry."""
+        image = 0
+        for start, table in self.tables[symmetry]:
+            image |= table[mask >> start & CHUNK_MASK]
+        return image
+
+    def canonical(self, a, b):
+        """
+        Returns (a, b, symmetry): the smallest image of the position
+        with masks a and b, and the symmetry that produces it.
+        """
+        best = (a, b, 0)
+        for symmetry in range(1, len(self.tables)):
+            image = (self.transform(a, symmetry), self.transform(b, symmetry), symmetry)
+            if image < best:
+                best = image
+        return best
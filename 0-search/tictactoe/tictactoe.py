@@ -1,13 +1,69 @@
 """
 Tic Tac Toe Player
+
+Search runs on bitboards: each player's marks are a 9-bit mask with
+cell (i, j) at bit 3 * i + j, so moves are single bit operations and
+wins are table lookups. The list-of-lists functions below adapt boards
+to and from masks.
 """
-import copy
 import math
+import os
+
+from symmetry import Symmetries
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Mask of every cell
+FULL = 0b111111111
+
+# Masks of the three rows, three columns and two diagonals
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+
+# Indexed by a player's mask: 1 if it holds a complete line
+WINNING = bytes(
+    any(mask & line == line for line in WIN_MASKS) for mask in range(FULL + 1)
+)
+
+# Indexed by a player's mask: the number of marks it holds
+MARKS = bytes(bin(mask).count("1") for mask in range(FULL + 1))
+
+# Cells in the order plain search tries them
+CELLS = list(range(9))
+
+# Moves in the order alpha-beta search tries them: center, corners, edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+ORDERED_CELLS = [3 * i + j for i, j in MOVE_ORDER]
+
+# Search modes minimax accepts
+SEARCHES = ("table", "cached", "alphabeta", "minimax")
+
+# Counts positions searched by the most recent minimax call
+search_stats = {"nodes": 0}
+
+# Precomputed perfect play, written by build_table: one byte per position
+# indexed by TERNARY[x] + 2 * TERNARY[o], holding (value + 1) << 4 | cell,
+# or NO_MOVE for unreachable and terminal positions
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.table")
+TABLE_MAGIC = b"TTT1"
+NO_MOVE = 0xFF
+TERNARY = [sum(3 ** cell for cell in range(9) if mask >> cell & 1)
+           for mask in range(FULL + 1)]
+perfect_play = None
+
+# Rotations and reflections of the board
+SYMMETRIES = Symmetries(3, 3)
+
+# Transposition table shared by every minimax call in the process:
+# maps the canonical encoding of each board, its smallest symmetric
+# image, to its solved (value, cell) in that image
+transpositions = {}
+
 
 def initial_state():
     """
@@ -31,14 +87,8 @@ def player(board):
 
     any return value is acceptable if a terminal board is provided as input
     '''
-    elements = []
-    for r in board:
-        [elements.append(c) for c in r]
-    
-    x_count = elements.count(X)
-    o_count = elements.count(O)
-    value = X if ((x_count <= o_count) or (board == initial_state())) else O
-    return value
+    x, o = to_bits(board)
+    return X if MARKS[x] <= MARKS[o] else O
 
 
 def actions(board):
@@ -54,13 +104,9 @@ def actions(board):
     
     any return value is acceptable if a terminal board is provided as input
     '''
-    actions_list = []
-    for i, r in enumerate(board): 
-        for j, c in enumerate(r):
-            if c == EMPTY: 
-                actions_list.append((i,j))
-    
-    return actions_list
+    x, o = to_bits(board)
+    empty = FULL & ~(x | o)
+    return [divmod(cell, 3) for cell in CELLS if empty >> cell & 1]
 
 
 
@@ -82,13 +128,14 @@ def result(board, action):
     '''
 
     x_coord, y_coord = action
+    if not (0 <= x_coord < 3 and 0 <= y_coord < 3) or board[x_coord][y_coord] != EMPTY:
+        raise ValueError(f"invalid action {action}")
 
-    prev_board = copy.deepcopy(board)
-    player_turn = player(board)
+    # Cells hold immutable marks, so copying the rows copies the board
+    new_board = [list(row) for row in board]
+    new_board[x_coord][y_coord] = player(board)
 
-    prev_board[x_coord][y_coord] = player_turn
-
-    return prev_board
+    return new_board
 
 
 def winner(board):
@@ -104,34 +151,11 @@ def winner(board):
     at most 1 winner 
     return None if tie 
     '''
-    cases = []
-    col = []
-    
-    for i, row in enumerate(board):
-        # check columns
-        cl = []
-        [cl.append(r[i]) for r in board]
-        col.append(cl)
-    
-    # check diagonal
-
-    diag_1 = [r[j] for j, r in enumerate(board)]
-    diag_2 = [r[len(board) - j - 1] for j, r in enumerate(board)]
-
-
-    [cases.append(row) for row in board]
-    [cases.append(c) for c in col]
-    cases.append(diag_1)
-    cases.append(diag_2)
-
-    for case in cases: 
-
-        c = list(set(case))
-        if len(c) == 1 and None not in c:
-            # winner found 
-            winner = X if X in c else O
-            return winner 
-        
+    x, o = to_bits(board)
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
     return None
 
 
@@ -149,18 +173,8 @@ def terminal(board):
 
     terminal: 3 in a row, or no empty
     '''
-    
-    if winner(board) is not None:
-        # Cases where there is a winner
-        return True 
-    else:
-        for r in board:
-            if None in r:
-                # Game still in progress
-                return False
-            
-        # Tie
-        return True
+    x, o = to_bits(board)
+    return bool(WINNING[x] or WINNING[o]) or x | o == FULL
 
 
 
@@ -174,12 +188,20 @@ def utility(board):
     return: 1 if X won the game, -1 if O, 0 if draw
     will only be called on a board if terminal(board) is True
     '''
-
-    return 1 if winner(board) == X else -1 if winner(board) == O else 0
+    x, o = to_bits(board)
+    return bit_utility(x, o)
   
-def minimax(board):
+def minimax(board, search=None):
     """
     Returns the optimal action for the current player on the board.
+
+    `search` is "table" to look the move up in the precomputed perfect
+    play table, "cached" to solve each position once through the shared
+    transposition table, "alphabeta" for alpha-beta pruning with move
+    ordering, or "minimax" for a plain search. By default the table is
+    used when it was loaded, and the cached search otherwise, which
+    "table" also falls back to without one. Any other `search` raises
+    ValueError.
     """
     # TODO
     '''
@@ -197,10 +219,32 @@ def minimax(board):
 
     and vice versa
     '''
-    ai_player = player(board)
-    v, a = max_value(board) if ai_player == X else min_value(board)
+    if search is not None and search not in SEARCHES:
+        raise ValueError(f"unknown search {search!r}; choose from {', '.join(SEARCHES)}")
+    search_stats["nodes"] = 0
+    x, o = to_bits(board)
+    if search is None:
+        search = "table" if perfect_play is not None else "cached"
+    if search == "table":
+        entry = NO_MOVE if perfect_play is None else perfect_play[TERNARY[x] + 2 * TERNARY[o]]
+        if entry != NO_MOVE:
+            return divmod(entry & 0xF, 3)
+        # No table loaded, or a terminal or unreachable position: fall
+        # back to search
+        search = "cached"
+
+    ai_player = X if MARKS[x] <= MARKS[o] else O
+    if search == "alphabeta":
+        alpha, beta = -math.inf, math.inf
+        if ai_player == X:
+            v, a = alphabeta_max(x, o, alpha, beta)
+        else:
+            v, a = alphabeta_min(x, o, alpha, beta)
+    else:
+        table = transpositions if search == "cached" else None
+        v, a = max_value(x, o, table) if ai_player == X else min_value(x, o, table)
 
-    return a
+    return None if a is None else divmod(a, 3)
 
 '''
 For all functions that accept board as input, you may assume that it is a valid board (list that contains 3 rows each with 3 values)
@@ -208,9 +252,113 @@ do not modify function declarations
 '''
 
 ### ADDITIONAL HELPER FUNCTIONS ###
-def max_value(board):
+def to_bits(board):
+    """
+    Returns the (x, o) masks of the cells each player has marked.
+    """
+    x = o = 0
+    bit = 1
+    for row in board:
+        for cell in row:
+            if cell == X:
+                x |= bit
+            elif cell == O:
+                o |= bit
+            bit <<= 1
+    return x, o
+
+
+def bit_utility(x, o):
+    """
+    Returns 1 if X has a line, -1 if O has, 0 otherwise.
+    """
+    return 1 if WINNING[x] else -1 if WINNING[o] else 0
+
+
+def rollout(board, rng):
+    """
+    Plays random moves from the board to the end of the game, using
+    bitmasks rather than board copies, and returns its utility.
+    """
+    x, o = to_bits(board)
+    if WINNING[x] or WINNING[o]:
+        return bit_utility(x, o)
+    cells = [cell for cell in CELLS if not (x | o) >> cell & 1]
+    rng.shuffle(cells)
+    x_moves = MARKS[x] <= MARKS[o]
+    for cell in cells:
+        if x_moves:
+            x |= 1 << cell
+            if WINNING[x]:
+                return 1
+        else:
+            o |= 1 << cell
+            if WINNING[o]:
+                return -1
+        x_moves = not x_moves
+    return 0
+
+
+def encode(board):
+    """
+    Returns a hashable encoding of the board, used as a transposition
+    table key. The player to move follows from the board itself.
+    """
+    x, o = to_bits(board)
+    return x << 9 | o
+
+
+def canonical_key(x, o):
+    """
+    Returns the transposition table key of a position, shared by all
+    its rotations and reflections, and the symmetry that maps the
+    position onto its canonical image.
+    """
+    x, o, symmetry = SYMMETRIES.canonical(x, o)
+    return x << 9 | o, symmetry
+
+
+class GameState():
+    """
+    A game played move by move from the empty board on bitmasks, as
+    tournament.py plays its games, so no move rebuilds or rescans a
+    list-of-lists board to find the player or the winner.
+    """
+
+    def __init__(self):
+        self.x = self.o = 0
+        self.count = 0
+        self.winner = None
+
+    def player(self):
+        """Returns the player who has the next turn."""
+        return X if self.count % 2 == 0 else O
+
+    def play(self, cell):
+        """Marks `cell` for the player to move."""
+        if self.player() == X:
+            self.x |= 1 << cell
+            if WINNING[self.x]:
+                self.winner = X
+        else:
+            self.o |= 1 << cell
+            if WINNING[self.o]:
+                self.winner = O
+        self.count += 1
+
+    def terminal(self):
+        """Returns True if the game is over, False otherwise."""
+        return self.winner is not None or self.count == 9
+
+    def board(self):
+        """Returns the game as a list-of-lists board."""
+        return [[X if self.x >> 3 * i + j & 1 else O if self.o >> 3 * i + j & 1 else EMPTY
+                 for j in range(3)] for i in range(3)]
+
+
+def max_value(x, o, table=None):
     '''
-    state = board
+    state = board, as the masks x and o, with X to move
     LECTURE NOTES
     v = - inf
     if terminal(state):
@@ -219,26 +367,43 @@ def max_value(board):
     for action in actions(state):
         v = max(v, min-value(result(state, action)))
         return v
-    '''
-    v = float('-inf')
-
-    if terminal(board):
-        return utility(board), None
 
-    for action in actions(board):
-        ret, n = min_value(result(board, action))
-        if ret > v: 
-            v = ret 
-            a = action 
+    returns (v, cell) where cell is the bit index of the best move
+    '''
+    if table is not None:
+        key, symmetry = canonical_key(x, o)
+        if key in table:
+            v, a = table[key]
+            return v, SYMMETRIES.inverse[symmetry][a]
+
+    search_stats["nodes"] += 1
+    # Only O, who just moved, can have completed a line
+    if WINNING[o]:
+        return -1, None
+    if x | o == FULL:
+        return 0, None
+
+    v = -math.inf
+    empty = FULL & ~(x | o)
+    for cell in CELLS:
+        if not empty >> cell & 1:
+            continue
+        ret, n = min_value(x | 1 << cell, o, table)
+        if ret > v:
+            v = ret
+            a = cell
             if v == 1:
                 # terminal state, X has won
-                return v, a
-        
+                break
+
+    if table is not None:
+        table[key] = v, SYMMETRIES.forward[symmetry][a]
     return v, a
 
-def min_value(board):
+
+def min_value(x, o, table=None):
     '''
-    state = board
+    state = board, as the masks x and o, with O to move
     LECTURE NOTES
     v = infinity
     if terminal(state):
@@ -247,18 +412,144 @@ def min_value(board):
     for action in actions(state):
         v = min(v, max-value(result(state, action)))
         return v
-    '''
-    v = float('inf')
-    if terminal(board):
-        return utility(board), None
 
-    for action in actions(board):
-        ret, n = max_value(result(board, action))
+    returns (v, cell) where cell is the bit index of the best move
+    '''
+    if table is not None:
+        key, symmetry = canonical_key(x, o)
+        if key in table:
+            v, a = table[key]
+            return v, SYMMETRIES.inverse[symmetry][a]
+
+    search_stats["nodes"] += 1
+    # Only X, who just moved, can have completed a line
+    if WINNING[x]:
+        return 1, None
+    if x | o == FULL:
+        return 0, None
+
+    v = math.inf
+    empty = FULL & ~(x | o)
+    for cell in CELLS:
+        if not empty >> cell & 1:
+            continue
+        ret, n = max_value(x, o | 1 << cell, table)
         if ret < v:
-            v = ret 
-            a = action
+            v = ret
+            a = cell
             if v == -1:
-                # terminal state, O has won 
-                return v, a
+                # terminal state, O has won
+                break
+
+    if table is not None:
+        table[key] = v, SYMMETRIES.forward[symmetry][a]
+    return v, a
+
+
+def alphabeta_max(x, o, alpha, beta):
+    '''
+    max_value with alpha-beta pruning: alpha is the best value X is
+    already assured of elsewhere and beta the best O is, so once
+    v >= beta O will never allow this position and the rest of its
+    moves can be skipped
+    '''
+    search_stats["nodes"] += 1
+    # Only O, who just moved, can have completed a line
+    if WINNING[o]:
+        return -1, None
+    if x | o == FULL:
+        return 0, None
+
+    v = -math.inf
+    empty = FULL & ~(x | o)
+    for cell in ORDERED_CELLS:
+        if not empty >> cell & 1:
+            continue
+        ret, n = alphabeta_min(x | 1 << cell, o, alpha, beta)
+        if ret > v:
+            v = ret
+            a = cell
+        if v >= beta:
+            break
+        alpha = max(alpha, v)
+
+    return v, a
+
+
+def alphabeta_min(x, o, alpha, beta):
+    '''
+    min_value with alpha-beta pruning, the mirror of alphabeta_max
+    '''
+    search_stats["nodes"] += 1
+    # Only X, who just moved, can have completed a line
+    if WINNING[x]:
+        return 1, None
+    if x | o == FULL:
+        return 0, None
+
+    v = math.inf
+    empty = FULL & ~(x | o)
+    for cell in ORDERED_CELLS:
+        if not empty >> cell & 1:
+            continue
+        ret, n = alphabeta_max(x, o | 1 << cell, alpha, beta)
+        if ret < v:
+            v = ret
+            a = cell
+        if v <= alpha:
+            break
+        beta = min(beta, v)
+
+    return v, a
+
+
+def build_table(filename=TABLE_FILE):
+    """
+    Solves every position reachable from the initial state and writes
+    the best move and value of each to `filename`.
+    """
+    table = bytearray([NO_MOVE]) * 3 ** 9
+    positions = [(0, 0)]
+    seen = {(0, 0)}
+    while positions:
+        x, o = positions.pop()
+        if WINNING[x] or WINNING[o] or x | o == FULL:
+            continue
+        if MARKS[x] <= MARKS[o]:
+            v, cell = max_value(x, o, transpositions)
+            children = [(x | 1 << c, o) for c in CELLS if not (x | o) >> c & 1]
+        else:
+            v, cell = min_value(x, o, transpositions)
+            children = [(x, o | 1 << c) for c in CELLS if not (x | o) >> c & 1]
+        table[TERNARY[x] + 2 * TERNARY[o]] = (v + 1) << 4 | cell
+        for child in children:
+            if child not in seen:
+                seen.add(child)
+                positions.append(child)
+
+    with open(filename, "wb") as f:
+        f.write(TABLE_MAGIC)
+        f.write(table)
+
+
+def load_table(filename=TABLE_FILE):
+    """
+    Loads the perfect play table written by build_table, if present,
+    so minimax answers by lookup instead of search.
+    """
+    global perfect_play
+    try:
+        with open(filename, "rb") as f:
+            data = f.read()
+    except OSError:
+        return
+    if data[:len(TABLE_MAGIC)] == TABLE_MAGIC and len(data) == len(TABLE_MAGIC) + 3 ** 9:
+        perfect_play = data[len(TABLE_MAGIC):]
+
+
+load_table()
+
 
-    return v, a 
+if __name__ == "__main__":
+    build_table()
+    print(f"Wrote {TABLE_FILE}")
@@ -0,0 +1,125 @@
+"""
+Plays tictactoe engines against each other without pygame, across a
+pool of worker processes, and reports the results, games per second,
+and the nodes searched and time taken per move by each engine.
+"""
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import mcts
+import tictactoe as ttt
+
+# Games played when no count is given
+GAMES = 1000
+
+# Games handed to a worker at a time
+CHUNK_SIZE = 16
+
+# Percentiles of move latency reported per engine
+PERCENTILES = (50, 90, 99)
+
+# Engines by name: the minimax search modes, Monte Carlo Tree Search
+# and a random mover
+ENGINES = ["minimax", "cached", "alphabeta", "table", "mcts", "random"]
+
+# Iterations the mcts engine runs per move, fixed so games are repeatable
+MCTS_ITERATIONS = 1000
+
+
+def main():
+    if len(sys.argv) not in (3, 4, 5, 6):
+        sys.exit("Usage: python tournament.py x_engine o_engine [games] [workers] [seed]")
+    engines = sys.argv[1:3]
+    for engine in engines:
+        if engine not in ENGINES:
+            sys.exit(f"Unknown engine {engine}; choose from {', '.join(ENGINES)}")
+    games = int(sys.argv[3]) if len(sys.argv) >= 4 else GAMES
+    workers = int(sys.argv[4]) if len(sys.argv) >= 5 else os.cpu_count()
+    seed = int(sys.argv[5]) if len(sys.argv) == 6 else 0
+
+    start = time.perf_counter()
+    outcomes = {ttt.X: 0, ttt.O: 0, None: 0}
+    moves = {ttt.X: [], ttt.O: []}
+    for winner, game_moves in run(engines, games, workers, seed):
+        outcomes[winner] += 1
+        for mark, seconds, nodes in game_moves:
+            moves[mark].append((seconds, nodes))
+    elapsed = time.perf_counter() - start
+
+    print(f"{games} games in {elapsed:.2f}s, {games / elapsed:.1f} games/sec")
+    print(f"X ({engines[0]}) wins {outcomes[ttt.X]}, "
+          f"O ({engines[1]}) wins {outcomes[ttt.O]}, draws {outcomes[None]}")
+    for mark, engine in zip((ttt.X, ttt.O), engines):
+        report(f"{mark} ({engine})", moves[mark])
+
+
+def run(engines, games, workers, seed=0):
+    """
+    Plays `games` games between the (X, O) `engines` across a pool of
+    `workers` processes, yielding each game's result in completion order.
+    """
+    context = multiprocessing.get_context(
+        "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    )
+    jobs = ((engines[0], engines[1], seed + game) for game in range(games))
+    with context.Pool(workers) as pool:
+        yield from pool.imap_unordered(play, jobs, CHUNK_SIZE)
+
+
+def play(job):
+    """
+    Plays one game of the (x_engine, o_engine, seed) `job`, returning
+    the winner and a (mark, seconds, nodes) tuple for every move made.
+    """
+    x_engine, o_engine, seed = job
+    rng = random.Random(seed)
+    engines = {ttt.X: x_engine, ttt.O: o_engine}
+    for mark, engine in engines.items():
+        if engine == "mcts":
+            # One tree per player, reused across the game's moves
+            engines[mark] = mcts.MCTS(ttt, MCTS_ITERATIONS, None, seed=rng.randrange(1 << 32))
+    state = ttt.GameState()
+    moves = []
+    while not state.terminal():
+        mark = state.player()
+        board = state.board()
+        start = time.perf_counter()
+        action, nodes = choose(engines[mark], board, rng)
+        moves.append((mark, time.perf_counter() - start, nodes))
+        state.play(3 * action[0] + action[1])
+    return state.winner, moves
+
+
+def choose(engine, board, rng):
+    """
+    Returns the action `engine` plays on the board and the number of
+    positions it searched, or iterations it ran, to find it.
+    """
+    if engine == "random":
+        return rng.choice(ttt.actions(board)), 0
+    if isinstance(engine, mcts.MCTS):
+        action = engine.choose(board)
+        return action, engine.stats["iterations"]
+    action = ttt.minimax(board, search=engine)
+    return action, ttt.search_stats["nodes"]
+
+
+def report(label, moves):
+    """Prints the average nodes and latency percentiles of moves."""
+    if not moves:
+        print(f"{label}: no moves")
+        return
+    latencies = sorted(seconds for seconds, _ in moves)
+    nodes = sum(n for _, n in moves) / len(moves)
+    percentiles = []
+    for p in PERCENTILES:
+        rank = max(0, -(-p * len(latencies) // 100) - 1)
+        percentiles.append(f"p{p} {latencies[rank] * 1000:.3f} ms")
+    print(f"{label}: {len(moves)} moves, {nodes:.1f} nodes/move, {', '.join(percentiles)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 import itertools
 
+# Symbols whose truth values are packed into bitsets together; the
+# remaining symbols of larger sentences are enumerated one assignment at
+# a time, keeping each bitset at 2 ** VECTOR_SYMBOLS bits
+VECTOR_SYMBOLS = 16
+
 
 class Sentence():
 
@@ -7,6 +12,14 @@ class Sentence():
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_bits(self, columns, full):
+        """
+        Evaluates the logical sentence in many models at once: bit m of
+        each symbol's column in `columns` is its value in model m, and
+        bit m of the result is the sentence's. `full` has every bit set.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -62,6 +75,12 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_bits(self, columns, full):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
     def formula(self):
         return self.name
 
@@ -86,6 +105,9 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_bits(self, columns, full):
+        return full & ~self.operand.evaluate_bits(columns, full)
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
@@ -120,6 +142,14 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_bits(self, columns, full):
+        bits = full
+        for conjunct in self.conjuncts:
+            bits &= conjunct.evaluate_bits(columns, full)
+            if not bits:
+                break
+        return bits
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -151,6 +181,14 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_bits(self, columns, full):
+        bits = 0
+        for disjunct in self.disjuncts:
+            bits |= disjunct.evaluate_bits(columns, full)
+            if bits == full:
+                break
+        return bits
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -183,6 +221,10 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_bits(self, columns, full):
+        return ((full & ~self.antecedent.evaluate_bits(columns, full))
+                | self.consequent.evaluate_bits(columns, full))
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
@@ -216,6 +258,10 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_bits(self, columns, full):
+        return full & ~(self.left.evaluate_bits(columns, full)
+                        ^ self.right.evaluate_bits(columns, full))
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
@@ -228,36 +274,33 @@ class Biconditional(Sentence):
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    packed = symbols[:VECTOR_SYMBOLS]
+    enumerated = symbols[VECTOR_SYMBOLS:]
+
+    # Bit m of a packed symbol's column is its value in model m, so the
+    # columns together hold every assignment of the packed symbols
+    models = 1 << len(packed)
+    full = (1 << models) - 1
+    columns = {}
+    for i, p in enumerate(packed):
+        width = 1 << i
+        column = ((1 << width) - 1) << width
+        width *= 2
+        while width < models:
+            column |= column << width
+            width *= 2
+        columns[p] = column
+
+    # Each assignment of the other symbols sets their columns all true or
+    # all false; entailment must hold for every one
+    for values in itertools.product((True, False), repeat=len(enumerated)):
+        for p, value in zip(enumerated, values):
+            columns[p] = full if value else 0
+
+        # Query must be true in every model where knowledge base is true
+        true_models = knowledge.evaluate_bits(columns, full)
+        if true_models & ~query.evaluate_bits(columns, full):
+            return False
+    return True